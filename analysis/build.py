@@ -0,0 +1,148 @@
+#%%
+import os
+import json
+import time
+import hashlib
+import argparse
+from itertools import combinations
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import common_fn as cf
+
+manifest='../analysed_data/.build.json' # Signatures of the last successful builds
+cats=['p2ex','p0ex','comp','coor','semi','indep']
+parms=('p','q','r','s','l')
+
+def targets(parm_name,swept=(),cats=cats,eps=0.1,normalize='max'):
+    # Build targets of one sweep: (name, function, args, kwargs, inputs, outputs, level)
+    raw=cf.raw_file(parm_name)
+    adat=['../analysed_data/'+parm_name+'/classified.csv']
+    fig='../figures/'+parm_name+'/'
+    t=[(parm_name+':classify','classify',(parm_name,cats),dict(eps=eps,normalize=normalize),[raw],adat,0),
+        (parm_name+':p2vp0','p2vp0',(parm_name,),{},[raw],[fig+'p2vp0.svg'],0),
+        (parm_name+':p2vp0_cat','p2vp0_cat',(parm_name,cats),{},adat,[fig+'p2vp0-classified.svg'],1),
+        (parm_name+':parm_box','parm_box',(parm_name,cats),{},adat,[fig+'parms.svg'],1)]
+    for parm in swept:
+        t.append((parm_name+':p2vp0_parm-'+parm,'p2vp0_parm',(parm_name,parm),{},[raw],[fig+'p2vp0-'+parm+'.svg'],0))
+    return t
+
+def all_targets():
+    t=[]
+    for parm in parms:
+        t+=targets('sweep-'+parm,(parm,))
+    for parm in combinations(parms,2):
+        t+=targets('sweep-'+''.join(parm),parm)
+    for parm_name in ('loguni','uni'):
+        t+=targets(parm_name)
+    return t
+
+def file_hash(fname,stats):
+    # Content hash, reused while size and modification time are unchanged
+    st=os.stat(fname)
+    key=[st.st_size,st.st_mtime_ns]
+    if fname in stats and stats[fname][0]==key:
+        return stats[fname][1]
+    h=hashlib.sha256()
+    with open(fname,'rb') as f:
+        for block in iter(lambda: f.read(1<<20),b''):
+            h.update(block)
+    stats[fname]=[key,h.hexdigest()]
+    return stats[fname][1]
+
+def signature(target,stats):
+    # Hash of the inputs, the options and the analysis code
+    name,fn,args,kwargs,inputs,outputs,level=target
+    h=hashlib.sha256(json.dumps([fn,args,kwargs]+([] if fn=='classify' else [cf.render]),sort_keys=True).encode())
+    for fname in inputs+['common_fn.py','../codes/categories.py']:
+        h.update(file_hash(fname,stats).encode() if os.path.isfile(fname) else b'missing')
+    return h.hexdigest()
+
+def init_worker(render,headless=False):
+    # Warm worker: rendering mode, last raw sweep kept in memory and matplotlib (and TeX) started once
+    cf.render=render
+    cf.headless=headless
+    cf.raw_cache={}
+    if headless:
+        return
+    plt=cf.plotting()
+    fig=plt.figure()
+    plt.xlabel(r'$p_0$')
+    plt.ylabel(r'$p_2$')
+    fig.canvas.draw()
+    plt.close(fig)
+
+def run_group(group):
+    # Targets of one sweep in order, the classified data handed on in memory
+    t=time.perf_counter()
+    df=None
+    for name,fn,args,kwargs,inputs,outputs,level in group:
+        cf.mkdirs(args[0])
+        if fn in ('p2vp0_cat','parm_box') and df is not None:
+            kwargs=dict(kwargs,df=df)
+        out=getattr(cf,fn)(*args,force=True,**kwargs)
+        if fn=='classify':
+            df=out
+    return time.perf_counter()-t
+
+def build(t,workers=None,dry_run=False,render=None,force=False):
+    """Rebuilds the stale targets, one job per sweep spread over a process pool
+
+    A target is stale if any output is missing or the hash of its inputs,
+    options, the render mode, common_fn.py or categories.py changed since its last build.
+    Targets only depend on targets of the same sweep, so each sweep's stale
+    targets run in order on one warm worker that reads its raw data once,
+    the largest sweeps first.
+    """
+    if render:
+        cf.render=render
+    state={'stats':{},'targets':{}}
+    if os.path.isfile(manifest):
+        with open(manifest) as f:
+            state=json.load(f)
+    stats,done=state['stats'],state['targets']
+    dirty=set() # Outputs of targets being rebuilt
+    groups={}
+    for target in sorted(t,key=lambda x: x[6]):
+        if not all(os.path.isfile(f) or f in dirty for f in target[4]):
+            print('skip',target[0],'(missing input)')
+            continue
+        if force or dirty.intersection(target[4]) or not all(os.path.isfile(f) for f in target[5]) or done.get(target[0])!=signature(target,stats):
+            groups.setdefault(target[2][0],[]).append(target)
+            dirty.update(target[5])
+    if dry_run:
+        return [x[0] for g in groups.values() for x in g]
+    built=[]
+    wall=time.perf_counter()
+    with ProcessPoolExecutor(workers,initializer=init_worker,initargs=(cf.render,cf.headless)) as ex:
+        futures={ex.submit(run_group,g):g for g in sorted(groups.values(),key=lambda g: os.path.getsize(cf.raw_file(g[0][2][0])),reverse=True)}
+        for fut in as_completed(futures):
+            g=futures[fut]
+            dt=fut.result()
+            # Outputs changed, so their hashes are recomputed for the signatures
+            for target in g:
+                for fname in target[5]:
+                    stats.pop(fname,None)
+            for target in g:
+                done[target[0]]=signature(target,stats)
+                built.append(target[0])
+            print('%-24s %3d targets %8.2f s'%(g[0][2][0],len(g),dt))
+            with open(manifest,'w') as f:
+                json.dump(state,f)
+    print('%d targets in %.2f s'%(len(built),time.perf_counter()-wall))
+    return built
+
+#%%
+if __name__=='__main__':
+    parser=argparse.ArgumentParser(description='Rebuild stale analysed data and figures')
+    parser.add_argument('match',nargs='*',help='Only targets containing one of these strings')
+    parser.add_argument('-j','--workers',type=int,default=None,help='No. of worker processes')
+    parser.add_argument('-n','--dry-run',action='store_true',help='Only list the stale targets')
+    parser.add_argument('-f','--force',action='store_true',help='Rebuild the matching targets even if up to date')
+    parser.add_argument('--render',choices=('vector','raster','density'),default=None,help='Point cloud rendering, by default common_fn.render')
+    parser.add_argument('--headless',action='store_true',help='Only classify, without loading matplotlib (also ARME_HEADLESS=1)')
+    a=parser.parse_args()
+    cf.headless=cf.headless or a.headless
+    t=[x for x in all_targets() if (not a.match or any(m in x[0] for m in a.match)) and (x[1]=='classify' or not cf.headless)]
+    built=build(t,a.workers,a.dry_run,a.render,a.force)
+    if a.dry_run:
+        for name in built:
+            print(name)
@@ -1,11 +1,40 @@
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
 import os
-plt.rcParams["svg.hashsalt"]=''
-plt.rcParams['text.usetex'] = True
-plt.rcParams["font.size"]=22
+import sys
+import functools
+sys.path.append('../codes')
+from prof import stage
+import categories
+plt=None # matplotlib.pyplot and seaborn, imported by the first figure, see plotting
+sns=None
+usetex=True # Typeset labels are cached by matplotlib's TexManager and reused across figures and runs
+headless=os.environ.get('ARME_HEADLESS','') not in ('','0') # Classify only, figure functions draw nothing and matplotlib is never imported
+render='raster' # How point clouds are drawn: vector, raster or density, see points
+bins=400 # Pixels per axis of the density images
+raw_cache=None # Set to a dict to keep the last raw sweep read in memory, as the build.py workers do
+
+def plotting():
+    # Import matplotlib and seaborn and set the figure style, once, returns pyplot
+    global plt,sns
+    if plt is None:
+        import matplotlib.pyplot as plt
+        import seaborn as sns
+        plt.rcParams["svg.hashsalt"]=''
+        plt.rcParams['text.usetex']=usetex
+        plt.rcParams["font.size"]=22
+        plt.rcParams["savefig.dpi"]=150 # Resolution of rasterized layers in vector output
+    return plt
+
+def figure(fn):
+    # Figure functions do nothing when headless, else load the plotting libraries first
+    @functools.wraps(fn)
+    def wrapper(*args,**kwargs):
+        if headless:
+            return None
+        plotting()
+        return fn(*args,**kwargs)
+    return wrapper
 
 def mkdirs(parm_name,):
     try:
@@ -17,21 +46,45 @@ def mkdirs(parm_name,):
     except:
         pass
 
-def ptsin(df,cat,eps):
-    if cat=='p0ex':
-        return df.p00>=1-2*eps
-    elif cat=='p2ex':
-        return df.p11>=1-2*eps
-    elif cat=='comp':
-        return df.p11<np.square(1-np.sqrt(df.p00)-eps)
-    elif cat=='coor':
-        return df.p11>=1-df.p00-eps
-    elif cat=='semi':
-        return df.p11>np.square(1-np.sqrt(df.p00)+eps)
-    elif cat=='indep':
-        return df.p11<=np.square(1-np.sqrt(df.p00)+eps)
+def raw_file(parm_name):
+    # Raw output in whichever format the sweep was written, the newest if it was written in several
+    rdatname='../raw_output/'+parm_name
+    found=[rdatname+ext for ext in ('.csv','.parquet','.feather','.npy') if os.path.isfile(rdatname+ext)]
+    if not found:
+        return rdatname+'.csv'
+    return max(found,key=lambda f: os.stat(f).st_mtime_ns)
+
+def read_raw(parm_name):
+    # Read the raw data in whichever format the sweep was written
+    fname=raw_file(parm_name)
+    with stage('read') as st:
+        if raw_cache is None:
+            df=_read_raw(fname)
+        else:
+            # Keep the last sweep read in memory, reread if the file changed, callers get a copy
+            key=(fname,os.stat(fname).st_mtime_ns)
+            if key not in raw_cache:
+                raw_cache.clear()
+                raw_cache[key]=_read_raw(fname)
+            df=raw_cache[key].copy()
+        st.add(len(df))
+    return df
+
+def _read_raw(fname):
+    ext=os.path.splitext(fname)[1]
+    if ext=='.parquet':
+        return pd.read_parquet(fname)
+    elif ext=='.feather':
+        return pd.read_feather(fname)
+    elif ext=='.npy':
+        y=np.load(fname,mmap_mode='r')
+        return pd.DataFrame(y,columns=['p','q','r','s','l','p00','p01','p10','p11'])
     else:
-        return 0
+        return pd.read_csv(fname)
+
+def ptsin(df,cat,eps):
+    # Points of df in cat, the criteria are defined once in codes/categories.py
+    return categories.ptsin(df.p00,df.p11,cat,eps)
 
 def normdf(df,normalize):
     if normalize=='max':
@@ -45,139 +98,194 @@ def normdf(df,normalize):
     if normalize=='s':
         return df.loc[:,'s']
 
+def categorize(df,cats,eps=0.1):
+    # Category of every point in one pass, the first category in cats that applies wins
+    codes=categories.categorize(df.p00,df.p11,cats,eps)
+    return pd.Categorical.from_codes(codes,categories=cats,ordered=True)
+
 def classify(parm_name,cats,eps=0.1,force=False,normalize=''):
     # Read the raw data
-    rdatname='../raw_output/'+parm_name+'.csv'
-    df=pd.read_csv(rdatname)
-    # For every category
-    for cat in cats:
-        adatname='../analysed_data/'+parm_name+'/'+cat+'.csv'
-        # Find points that satisfy category conditions
-        yes=ptsin(df,cat,eps)
-        # New dataframe with points that satisfy & remove from big dataframe 
-        ndf,df=df[yes],df[~yes]
+    df=read_raw(parm_name)
+    # Categorize all points at once, unclassified points are left as NaN
+    with stage('classify',len(df)):
+        df['Category']=categorize(df,cats,eps)
         if normalize:
-            ndf.loc[:,'p':'s']=ndf.loc[:,'p':'s'].div(normdf(ndf,normalize),axis=0)
-        if not os.path.isfile(adatname) or force: 
-            ndf.to_csv(adatname,index=False)
+            df.loc[:,'p':'s']=df.loc[:,'p':'s'].div(normdf(df,normalize),axis=0)
+    adatname='../analysed_data/'+parm_name+'/classified.csv'
+    if not os.path.isfile(adatname) or force: 
+        with stage('save',len(df)):
+            df.to_csv(adatname,index=False)
+    return df
 
+def read_classified(parm_name,cats):
+    # Read the categorized data in analysed_data
+    datfname='../analysed_data/'+parm_name+'/classified.csv'
+    with stage('read') as st:
+        df=pd.read_csv(datfname)
+        st.add(len(df))
+    df['Category']=pd.Categorical(df.Category,categories=cats,ordered=True)
+    return df
+
+@figure
+def points(ax,df,x,y,hue=None,color=None,label=None,palette='coolwarm',s=1,mode=None):
+    # Draw a point cloud (x, y in [0,1]) coloured by color or by the hue column, mode as for render:
+    #   vector - every point a vector marker, files grow with the no. of points
+    #   raster - points rasterized inside the vector axes, text and lines stay vector
+    #   density - bins x bins 2-D histogram drawn as an image, opacity from the count
+    #             (mean hue with hue), cost set by the image size not the no. of points
+    mode=mode or render
+    if mode in ('vector','raster'):
+        if hue is None:
+            ax.scatter(df[x],df[y],s=s,color=color,label=label,rasterized=mode=='raster')
+        else:
+            sns.scatterplot(data=df,x=x,y=y,hue=hue,edgecolor='none',palette=palette,ax=ax,rasterized=mode=='raster')
+        return
+    if mode!='density':
+        raise Exception("Render mode undefined")
+    extent=(0,1,0,1)
+    H=np.histogram2d(df[x],df[y],bins=bins,range=[extent[:2],extent[2:]])[0].T
+    if hue is None:
+        # Opacity from the log count of each pixel
+        img=np.zeros(H.shape+(4,))
+        img[...,:3]=plt.matplotlib.colors.to_rgb(color)
+        if H.any():
+            img[...,3]=np.where(H>0,0.3+0.7*np.log1p(H)/np.log1p(H.max()),0)
+        ax.imshow(img,origin='lower',extent=extent,aspect='auto',interpolation='nearest')
+        ax.scatter([],[],s=20,color=color,label=label) # Legend entry
+    else:
+        Hc=np.histogram2d(df[x],df[y],bins=bins,range=[extent[:2],extent[2:]],weights=df[hue])[0].T
+        with np.errstate(invalid='ignore'):
+            M=np.ma.masked_invalid(Hc/H)
+        im=ax.imshow(M,origin='lower',extent=extent,aspect='auto',interpolation='nearest',cmap=palette)
+        plt.colorbar(im,ax=ax,label=hue)
+
+@figure
 def p2vp0(parm_name,plot_lines=True,force=False):
     # Read the raw data
-    rdatname='../raw_output/'+parm_name+'.csv'
-    df=pd.read_csv(rdatname)
+    df=read_raw(parm_name)
     # Create a figure and plot points
     figname='../figures/'+parm_name+'/p2vp0.svg'
-    fig=plt.figure(figsize=(10,10))
-    plt.scatter(df.p00,df.p11,color='tab:red',s=1,label='Sim')
-    # Plot reference lines for coordinated and independent
-    if plot_lines:
-        x=np.linspace(0,1,100)
-        y_coord=1-x
-        y_indep=np.square(1-np.sqrt(x))
-        plt.plot(x,y_coord,label='Coord')
-        plt.plot(x,y_indep,label='Indep')
-    # Labels and legends
-    plt.xlabel(r'$p_0$')
-    plt.ylabel(r'$p_2$')
-    plt.legend()
-    fig.tight_layout()
+    with stage('plot',len(df)):
+        fig=plt.figure(figsize=(10,10))
+        points(plt.gca(),df,'p00','p11',color='tab:red',label='Sim')
+        # Plot reference lines for coordinated and independent
+        if plot_lines:
+            x=np.linspace(0,1,100)
+            y_coord=1-x
+            y_indep=np.square(1-np.sqrt(x))
+            plt.plot(x,y_coord,label='Coord')
+            plt.plot(x,y_indep,label='Indep')
+        # Labels and legends
+        plt.xlabel(r'$p_0$')
+        plt.ylabel(r'$p_2$')
+        plt.legend()
+        fig.tight_layout()
     # Save figure
     if not os.path.isfile(figname) or force: 
-        fig.savefig(figname)
+        with stage('save'):
+            fig.savefig(figname)
     # Clear figure
     fig.clf()
     plt.close(fig)
 
-def p2vp0_cat(parm_name,cats,force=False):
+@figure
+def p2vp0_cat(parm_name,cats,force=False,df=None):
+    # Categorized data, as returned by classify or read back from analysed_data
+    if df is None:
+        df=read_classified(parm_name,cats)
     # Create a figure
     figname='../figures/'+parm_name+'/p2vp0-classified.svg'
-    fig=plt.figure(figsize=(10,10))
-    # For every category
-    for cat in cats:
-        # Read categorized data in analysed_data
-        datfname='../analysed_data/'+parm_name+'/'+cat+'.csv'
-        df=pd.read_csv(datfname)
-        # Plot points
-        plt.scatter(df.p00,df.p11,s=1,label=cat)
-    # Labels and legends
-    plt.xlabel(r'$p_0$')
-    plt.ylabel(r'$p_2$')
-    plt.legend()
-    fig.tight_layout()
+    with stage('plot',len(df)):
+        fig=plt.figure(figsize=(10,10))
+        # For every category
+        for i,(cat,cdf) in enumerate(df.groupby('Category',observed=False)):
+            # Plot points
+            points(plt.gca(),cdf,'p00','p11',color='C%d'%i,label=cat)
+        # Labels and legends
+        plt.xlabel(r'$p_0$')
+        plt.ylabel(r'$p_2$')
+        plt.legend()
+        fig.tight_layout()
     # Save figure
     if not os.path.isfile(figname) or force: 
-        fig.savefig(figname)
+        with stage('save'):
+            fig.savefig(figname)
     # Clear figure
     fig.clf()
     plt.close(fig)
 
-def longdf(parm_name,cats):
-    ndf=pd.DataFrame()
-    for cat in cats:
-        datfname='../analysed_data/'+parm_name+'/'+cat+'.csv'
-        df=pd.read_csv(datfname)
-        tdf=pd.melt(df.loc[:,'p':'l'])
-        tdf['Category']=cat
-        ndf=pd.concat([ndf,tdf])
+def longdf(parm_name,cats,df=None):
+    if df is None:
+        df=read_classified(parm_name,cats)
+    ndf=pd.melt(df[df.Category.notna()],id_vars='Category',value_vars=['p','q','r','s','l'])
     return ndf
 
-def parm_box(parm_name,cats,force=False):
+@figure
+def parm_box(parm_name,cats,force=False,df=None):
     # Create a figure
     figname='../figures/'+parm_name+'/parms.svg'
-    fig, ax = plt.subplots(1,2,figsize=(20,10),gridspec_kw={'width_ratios': [4, 1]})
-    df=longdf(parm_name,cats)
-    yes=df.variable!='l'
-    df,dfl=df[yes],df[~yes]
-    # Plot boxplots, lambda scale different so in a subplot
-    b1=sns.boxplot(x="variable", y="value",hue="Category", data=df,ax=ax[0])
-    ax[1].set_yscale('log')
-    b2=sns.boxplot(x="variable", y="value",hue="Category", data=dfl,ax=ax[1])
-    # Labels and legends
-    ax[0].legend([],[], frameon=False)
-    b2.set(xlabel=None,ylabel=None,xticklabels=[r'$\lambda$'])
-    ax[1].legend(bbox_to_anchor=(1.02, 1), loc='upper left', borderaxespad=0)
-    fig.tight_layout()
+    with stage('plot'):
+        fig, ax = plt.subplots(1,2,figsize=(20,10),gridspec_kw={'width_ratios': [4, 1]})
+        df=longdf(parm_name,cats,df)
+        yes=df.variable!='l'
+        df,dfl=df[yes],df[~yes]
+        # Plot boxplots, lambda scale different so in a subplot
+        b1=sns.boxplot(x="variable", y="value",hue="Category", data=df,ax=ax[0])
+        ax[1].set_yscale('log')
+        b2=sns.boxplot(x="variable", y="value",hue="Category", data=dfl,ax=ax[1])
+        # Labels and legends
+        ax[0].legend([],[], frameon=False)
+        b2.set(xlabel=None,ylabel=None,xticklabels=[r'$\lambda$'])
+        ax[1].legend(bbox_to_anchor=(1.02, 1), loc='upper left', borderaxespad=0)
+        fig.tight_layout()
     # Save figure
     if not os.path.isfile(figname) or force: 
-        fig.savefig(figname)
+        with stage('save'):
+            fig.savefig(figname)
     # Clear figure
     fig.clf()
     plt.close(fig)
 
+@figure
 def timeseries(parm_name,force=False):
     rdatname='../raw_output/'+parm_name+'.csv'
     figname='../figures/'+parm_name+'/timeseries.svg'
     df=pd.read_csv(rdatname)
     df['G1']=2*(df.State%2)
     df['G2']=df.State//2
-    fig,ax=plt.figure(1,[20,10])
-    plt.plot(df.Time,df.G1,label='G1')
-    plt.plot(df.Time,df.G2,label='G2')
+    with stage('plot'):
+        fig,ax=plt.figure(1,[20,10])
+        plt.plot(df.Time,df.G1,label='G1')
+        plt.plot(df.Time,df.G2,label='G2')
     # Save figure
     if not os.path.isfile(figname) or force: 
-        fig.savefig(figname)
+        with stage('save'):
+            fig.savefig(figname)
     # Clear figure
     fig.clf()
     plt.close(fig)
 
+@figure
 def p2vp0_parm(parm_name,plt_parm,logl=True,force=False):
     # Read the raw data
-    rdatname='../raw_output/'+parm_name+'.csv'
-    df=pd.read_csv(rdatname)
+    df=read_raw(parm_name)
     if logl:
         df['l']=np.log(df['l'])
     # Create a figure and plot points
     figname='../figures/'+parm_name+'/p2vp0-'+plt_parm+'.svg'
-    fig=plt.figure(figsize=(10,10))
-    sns.scatterplot(data=df,x='p00',y='p11',hue=plt_parm,edgecolor='none',palette='coolwarm')
-    # Labels and legends
-    plt.xlabel(r'$p_0$')
-    plt.ylabel(r'$p_2$')
-    plt.legend()
-    fig.tight_layout()
+    with stage('plot',len(df)):
+        fig=plt.figure(figsize=(10,10))
+        points(plt.gca(),df,'p00','p11',hue=plt_parm)
+        # Labels and legends
+        plt.xlabel(r'$p_0$')
+        plt.ylabel(r'$p_2$')
+        if render!='density':
+            plt.legend()
+        fig.tight_layout()
     # Save figure
     if not os.path.isfile(figname) or force: 
-        fig.savefig(figname)
+        with stage('save'):
+            fig.savefig(figname)
     # Clear figure
     fig.clf()
     plt.close(fig)
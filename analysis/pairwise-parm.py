@@ -1,6 +1,5 @@
 #%%
 import common_fn as cf
-import matplotlib.pyplot as plt
 from itertools import combinations
 #%%
 cats=['p2ex','p0ex','comp','coor','semi','indep']
@@ -10,13 +9,13 @@ for parm in combinations(parms,2):
     #%%
     cf.mkdirs(parm_name)
     # %%
-    cf.classify(parm_name,cats,normalize='max',force=True)
+    df=cf.classify(parm_name,cats,normalize='max',force=True)
     # %%
     cf.p2vp0(parm_name,force=True)
     # %%
-    cf.p2vp0_cat(parm_name,cats,force=True)
+    cf.p2vp0_cat(parm_name,cats,force=True,df=df)
     # %%
-    cf.parm_box(parm_name,cats,force=True)
+    cf.parm_box(parm_name,cats,force=True,df=df)
     # %%
     cf.p2vp0_parm(parm_name,parm[0])
     cf.p2vp0_parm(parm_name,parm[1])
\ No newline at end of file
@@ -3,20 +3,33 @@ import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
+import os
+import sys
+sys.path.append('../codes')
+from traj import Trajectory
 plt.rcParams['text.usetex'] = True
 #%%
 parm='uni'
 # %%
-datname='../raw_output/'+parm+'-sim.csv'
+datname='../raw_output/'+parm+'-sim'
 figname='../figures/timeseries-'+parm+'.svg'
-df=pd.read_csv(datname)
+if os.path.isfile(datname+'.traj'):
+    # Bit-packed, only the steps plotted are decoded
+    traj=Trajectory(datname+'.traj')
+    df=pd.DataFrame({'Time':traj.Time[0:101],'State':traj.State[0:101]})
+else:
+    df=pd.read_csv(datname+'.csv')
 df['G1']=2*(df.State%2)
 df['G2']=df.State//2
 
 # %%
+# Rows hold the state from their Time until the next row, every step or only the changes
+df=df[df.Time<=100]
+if df.Time.iloc[-1]<100:
+    df=pd.concat([df,df.iloc[[-1]].assign(Time=100)],ignore_index=True) # Close the last run at t=100, as Simul.py does at t_max
 plt.figure(1,[10,10])
-plt.plot(df.Time[0:100],df.G1[0:100],label='G1')
-plt.plot(df.Time[0:100],df.G2[0:100],label='G2')
+plt.step(df.Time,df.G1,where='post',label='G1')
+plt.step(df.Time,df.G2,where='post',label='G2')
 
 plt.xlabel('Time')
 plt.ylabel('On/Off')
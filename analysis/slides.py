@@ -3,6 +3,8 @@ import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
+import common_fn as cf
+cf.plotting() # Common style first, the slide settings below override it
 plt.rcParams["svg.hashsalt"]=''
 plt.rcParams['text.usetex'] = True
 plt.rcParams["font.size"]=30
@@ -10,36 +12,36 @@ plt.style.use('dark_background')
 # %%
 def sweep2D(parms,i=1):
     parm_name='sweep-'+''.join(parms)
-    rdatname='../raw_output/'+parm_name+'.csv'
-    df=pd.read_csv(rdatname)
+    df=cf.read_raw(parm_name)
     df['l']=np.log10(df['l'])
     figname='../writing/Slides/figures/'+parm_name+'-'+parms[i]+'.pdf'
     fig=plt.figure(figsize=(10,10))
     x=np.linspace(0,1)
     y=np.square(1-np.sqrt(x))
     plt.plot(x,y,label='indp',color='w')
-    sns.scatterplot(data=df,x='p00',y='p11',hue=parms[i],edgecolor='none',palette='coolwarm')
+    cf.points(plt.gca(),df,'p00','p11',hue=parms[i])
     plt.xlabel(r'$p_0$')
     plt.ylabel(r'$p_2$')
-    plt.legend()
+    if cf.render!='density':
+        plt.legend()
     plt.savefig(figname)
     fig.clf()
     plt.close(fig)
 # %%
 def sweep(parms):
     parm_name='sweep-'+parms
-    rdatname='../raw_output/'+parm_name+'.csv'
-    df=pd.read_csv(rdatname)
+    df=cf.read_raw(parm_name)
     df['l']=np.log10(df['l'])
     figname='../writing/Slides/figures/'+parm_name+'.pdf'
     fig=plt.figure(figsize=(10,10))
     x=np.linspace(0,1)
     y=np.square(1-np.sqrt(x))
     plt.plot(x,y,label='indp',color='w')
-    sns.scatterplot(data=df,x='p00',y='p11',hue=parms,edgecolor='none',palette='coolwarm')
+    cf.points(plt.gca(),df,'p00','p11',hue=parms)
     plt.xlabel(r'$p_0$')
     plt.ylabel(r'$p_2$')
-    plt.legend()
+    if cf.render!='density':
+        plt.legend()
     plt.savefig(figname)
     fig.clf()
     plt.close(fig)
@@ -63,10 +65,11 @@ sweep('l')
 figname='../writing/Slides/figures/loguni-p2vp0-classified.pdf'
 fig=plt.figure(figsize=(10,10))
 cats=['p2ex','p0ex','comp','coor','semi','indep']
-for cat in cats:
-    datfname='../analysed_data/loguni/'+cat+'.csv'
-    df=pd.read_csv(datfname)
-    plt.scatter(df.p00,df.p11,label=cat)
+datfname='../analysed_data/loguni/classified.csv'
+cdf=pd.read_csv(datfname)
+cdf['Category']=pd.Categorical(cdf.Category,categories=cats,ordered=True)
+for i,(cat,df) in enumerate(cdf.groupby('Category',observed=False)):
+    cf.points(plt.gca(),df,'p00','p11',color='C%d'%i,label=cat,s=None)
 plt.xlabel(r'$p_0$')
 plt.ylabel(r'$p_2$')
 plt.legend()
@@ -78,13 +81,7 @@ plt.close(fig)
 # %%
 figname='../writing/Slides/figures/loguni-parms.pdf'
 fig, ax = plt.subplots(1,2,figsize=(20,10),gridspec_kw={'width_ratios': [4, 1]})
-df=pd.DataFrame()
-for cat in cats:
-    datfname='../analysed_data/loguni/'+cat+'.csv'
-    ndf=pd.read_csv(datfname)
-    tdf=pd.melt(ndf.loc[:,'p':'l'])
-    tdf['Category']=cat
-    df=pd.concat([df,tdf])
+df=pd.melt(cdf[cdf.Category.notna()],id_vars='Category',value_vars=['p','q','r','s','l'])
 yes=df.variable!='l'
 df,dfl=df[yes],df[~yes]
 b1=sns.boxplot(x="variable", y="value",hue="Category", data=df,ax=ax[0])
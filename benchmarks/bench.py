@@ -0,0 +1,151 @@
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import tracemalloc
+import subprocess
+import numpy as np
+
+root=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0,os.path.join(root,'codes'))
+import MM
+
+baseline=os.path.join(os.path.dirname(os.path.abspath(__file__)),'baseline.json')
+budget={'MM':0.25,'sweep':0.3,'arme':0.3,'common_fn':1.0} # Max seconds to import each module in a fresh process
+
+def timeit(fn,repeat:int=3):
+    # Best wall time of a few runs and the peak memory traced over one more run
+    best=np.inf
+    for i in range(repeat):
+        t=time.perf_counter()
+        fn()
+        best=min(best,time.perf_counter()-t)
+    tracemalloc.start()
+    fn()
+    peak=tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best,peak
+
+def kernel_cases(quick=False):
+    """Benchmark cases for the MM.py kernels
+
+    Returns
+    -------
+    cases : list of (str, int, str, callable)
+        - Name, no. of work units, unit and the function to time
+    """
+    sizes=[1,10**3,10**5] if quick else [1,10**3,10**5,10**6]
+    steps=[10**3,10**5] if quick else [10**3,10**5,10**7]
+    cases=[]
+    rng=np.random.default_rng(0)
+    for n in sizes:
+        R=MM.randomer(n,'loguni',rng)
+        TM=MM.T_batch(R)
+        cases.append(('T_batch',n,'sets',lambda R=R: MM.T_batch(R)))
+        cases.append(('steady_state',n,'solves',lambda TM=TM: MM.steady_state(TM)))
+        cases.append(('randomer',n,'sets',lambda n=n: MM.randomer(n,'loguni',1)))
+        if n<=10**3:
+            # Per set loops, too slow for the big sizes
+            cases.append(('T',n,'sets',lambda R=R: [MM.T(r) for r in R]))
+            cases.append(('markeig',n,'solves',lambda TM=TM: [MM.markeig(t) for t in TM]))
+    tm=MM.T([0.3,0.8,0.5,0.2,3])
+    for t in steps:
+        cases.append(('simulate',t,'steps',lambda t=t: MM.simulate(tm,t,rng=1)))
+        cases.append(('simulate-1000chains',t,'steps',lambda t=t: MM.simulate(tm,t//1000,n=1000,rng=1)))
+        if t<=10**3:
+            cases.append(('statechange',t,'steps',lambda t=t,g=np.random.default_rng(1): [MM.statechange(tm,0,g) for i in range(t)]))
+    return cases
+
+def import_time(module:str,repeat:int=3):
+    # Best time to import a module in a fresh interpreter, interpreter startup excluded
+    cwd=os.path.join(root,'analysis' if module=='common_fn' else 'codes')
+    env=dict(os.environ,PYTHONPATH=os.path.join(root,'codes'))
+    code='import time;t=time.perf_counter();import %s;print(time.perf_counter()-t)'%module
+    return min(float(subprocess.run([sys.executable,'-c',code],cwd=cwd,env=env,capture_output=True,text=True,check=True).stdout) for i in range(repeat))
+
+def run_driver(script:str,tmp:str):
+    # Run one of the input/ drivers on a scratch raw_output, returning wall time and peak RSS
+    os.makedirs(os.path.join(tmp,'input'),exist_ok=True)
+    os.makedirs(os.path.join(tmp,'raw_output'),exist_ok=True)
+    shutil.copy(os.path.join(root,'input',script),os.path.join(tmp,'input'))
+    env=dict(os.environ,PYTHONPATH=os.path.join(root,'codes'))
+    t=time.perf_counter()
+    p=subprocess.Popen([sys.executable,script],cwd=os.path.join(tmp,'input'),env=env)
+    # Resource usage of this driver alone
+    pid,status,ru=os.wait4(p.pid,0)
+    wall=time.perf_counter()-t
+    if status:
+        raise Exception(script+" failed")
+    return wall,ru.ru_maxrss*1024
+
+def run(quick=False,drivers=True,match=None):
+    results={}
+    for name,n,unit,fn in kernel_cases(quick):
+        key='%s[%d]'%(name,n)
+        if match and not any(m in key for m in match):
+            continue
+        t,peak=timeit(fn)
+        results[key]={'time':t,'rate':n/t,'unit':unit+'/s','peak':peak}
+        print('%-28s %10.4f s %12.3g %-9s %8.1f MB'%(key,t,n/t,unit+'/s',peak/2**20))
+    for module in budget:
+        key='import[%s]'%module
+        if match and not any(m in key for m in match):
+            continue
+        t=import_time(module)
+        results[key]={'time':t,'rate':1/t,'unit':'imports/s','peak':0}
+        print('%-28s %10.4f s %34s'%(key,t,'budget %.2f s'%budget[module]))
+    if drivers:
+        with tempfile.TemporaryDirectory() as tmp:
+            for script in ('randm.py','parm.py','pairwise-parm.py'):
+                key='driver[%s]'%script
+                if match and not any(m in key for m in match):
+                    continue
+                t,rss=run_driver(script,tmp)
+                results[key]={'time':t,'rate':1/t,'unit':'runs/s','peak':rss}
+                print('%-28s %10.4f s %34.1f MB RSS'%(key,t,rss/2**20))
+    return results
+
+def over_budget(results):
+    # Modules slower to import than their budget
+    return [m for m in budget if 'import[%s]'%m in results and results['import[%s]'%m]['time']>budget[m]]
+
+def compare(results,base,tol:float=0.2):
+    # Cases whose throughput fell by more than tol relative to the baseline
+    slower=[]
+    for key,r in results.items():
+        if key in base:
+            change=r['rate']/base[key]['rate']-1
+            print('%-28s %+7.1f%%'%(key,100*change))
+            if change<-tol:
+                slower.append(key)
+    return slower
+
+if __name__=='__main__':
+    parser=argparse.ArgumentParser(description='Benchmark the MM.py kernels and the sweep drivers')
+    parser.add_argument('match',nargs='*',help='Only cases containing one of these strings')
+    parser.add_argument('--quick',action='store_true',help='Skip the largest sizes')
+    parser.add_argument('--no-drivers',action='store_true',help='Skip the end-to-end drivers')
+    parser.add_argument('--save',action='store_true',help='Store the results as the baseline')
+    parser.add_argument('--compare',action='store_true',help='Compare with the baseline, exit 1 on a regression')
+    parser.add_argument('--tol',type=float,default=0.2,help='Allowed fractional drop in throughput')
+    parser.add_argument('--backend',choices=('auto','numba','numpy'),default=None,help='Kernel backend, see MM.backend')
+    a=parser.parse_args()
+    print('backend',MM.backend(a.backend))
+    results=run(a.quick,not a.no_drivers,a.match)
+    over=over_budget(results)
+    if over:
+        print('Over the import time budget:',', '.join(over))
+    if a.save:
+        with open(baseline,'w') as f:
+            json.dump(results,f,indent=1)
+    if a.compare:
+        with open(baseline) as f:
+            slower=compare(results,json.load(f),a.tol)
+        if slower:
+            print('Slower than baseline:',', '.join(slower))
+            sys.exit(1)
+    if over:
+        sys.exit(1)
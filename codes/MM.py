@@ -1,5 +1,50 @@
+import os
 import numpy as np
-from scipy.linalg import eig
+
+_backend=None # Resolved on first use, see backend
+_kernels=None
+
+def backend(name:str=None):
+    """Selects the implementation of the batch kernels T_batch, steady_state and simulate
+
+    The compiled kernels (kernels.py) need numba, they are fused loops over
+    parameter sets and chains without the (n,4,4) temporaries of NumPy.
+    Without an explicit choice the ARME_BACKEND environment variable is used,
+    numba is only imported when a kernel first runs.
+
+    Parameters
+    ----------
+    name : str, optional
+        - Backend to use from now on
+            - auto / numba if installed, else numpy (default)
+            - numba / compiled kernels
+            - numpy / pure NumPy
+
+    Returns
+    -------
+    name : str
+        - Backend in use, numba or numpy
+
+    Raises
+    ------
+    Backend undefined
+    numba not installed
+    """
+    global _backend,_kernels
+    if name is None and _backend is not None:
+        return _backend
+    name=name or os.environ.get('ARME_BACKEND','auto')
+    if name not in ('auto','numba','numpy'):
+        raise Exception("Backend undefined")
+    _kernels=None
+    if name!='numpy':
+        try:
+            import kernels as _kernels
+        except ImportError:
+            if name=='numba':
+                raise Exception("numba not installed")
+    _backend='numba' if _kernels is not None else 'numpy'
+    return _backend
 
 def T(R):
     """Generate the transition matrix from rate parameters
@@ -23,18 +68,62 @@ def T(R):
     ------
     N/A
     """
-    # Generate matrix from rates
-    TM = np.array(
-        [[R[0]**2,R[0]*R[2],R[0]*R[2],R[2]**2],
-        [R[0]*R[3],R[0]*R[1],R[2]*R[3],R[4]*R[1]*R[2]],
-        [R[0]*R[3],R[2]*R[3],R[0]*R[1],R[4]*R[1]*R[2]],
-        [R[3]*R[3],R[4]*R[1]*R[3],R[4]*R[1]*R[3],(R[4]*R[1])**2]])
-    # Normalize each column to 1 (for probability)
-    for i in range(4):
-        TM[:,i] /= TM[:,i].sum()
+    # Single set is a batch of one
+    TM = T_batch(np.asarray(R,dtype=float)[None,:])[0]
     return TM
 
-def randomer(n:int,lamdis:str):
+def T_batch(R):
+    """Generate the transition matrices for a batch of rate parameters
+
+    Parameters
+    ----------
+    R : NDArray (n,5)
+        - Rate and Interaction Parameters, one set per row
+        - [0] index: p / stayOff
+        - [1] index: q / stayOn
+        - [2] index: r / off
+        - [3] index: s / on
+        - [4] index: l / interaction parameter (lambda)
+
+    Returns
+    -------
+    TM : NDArray (n,4,4)
+        - Stack of transition matrices as defined in the model
+
+    Raises
+    ------
+    N/A
+    """
+    R = np.asarray(R,dtype=float)
+    if backend()=='numba':
+        return _kernels.t_batch(np.ascontiguousarray(R))
+    p,q,r,s,l = np.ascontiguousarray(R.T)
+    lq = l*q # On gene staying on with the other gene on
+    # Generate matrices from rates, entry by entry (matrix axes first so writes are contiguous)
+    TM = np.empty((4,4,len(R)))
+    TM[0,0] = p*p
+    TM[0,1] = p*r
+    TM[0,2] = p*r
+    TM[0,3] = r*r
+    TM[1,0] = p*s
+    TM[1,1] = p*q
+    TM[1,2] = r*s
+    TM[1,3] = lq*r
+    TM[2,0] = p*s
+    TM[2,1] = r*s
+    TM[2,2] = p*q
+    TM[2,3] = lq*r
+    TM[3,0] = s*s
+    TM[3,1] = lq*s
+    TM[3,2] = lq*s
+    TM[3,3] = lq*lq
+    # Normalize each column to 1 (for probability) in one broadcast
+    TM /= TM.sum(axis=0)
+    # Move the batch axis to the front
+    TM = np.ascontiguousarray(TM.transpose(2,0,1))
+    return TM
+
+def randomer(n:int,lamdis:str,rng=None):
     """Generate random set of rate parameters R and interaction parameter \lambda
 
     Parameters
@@ -45,6 +134,8 @@ def randomer(n:int,lamdis:str):
         - Sample distribution for lambda
             - loguni
             - uni
+    rng : int, SeedSequence or Generator, optional
+        - Source of randomness, fresh entropy by default
 
     Returns
     -------
@@ -61,7 +152,31 @@ def randomer(n:int,lamdis:str):
     \lambda distribution undefined
     """
     # Generates uniform random sets
-    R = np.random.rand(n,5)
+    R = np.random.default_rng(rng).random((n,5))
+    return from_unit(R,lamdis)
+
+def from_unit(U,lamdis:str):
+    """Map points of the unit cube to rate parameters as randomer does
+
+    Parameters
+    ----------
+    U : NDArray (n,5)
+        - Points in [0,1]^5
+    lamdis : str
+        - Sample distribution for lambda
+            - loguni
+            - uni
+
+    Returns
+    -------
+    R : NDArray (n,5)
+        - Rate and Interaction Parameters
+
+    Raises
+    ------
+    \lambda distribution undefined
+    """
+    R = np.array(U,dtype=float)
     if lamdis=='loguni':
         # Converts \lambda to uniform in log scale over 0 to 100
         R[:,4] = np.power(10,4*(R[:,4]-0.5))
@@ -72,6 +187,216 @@ def randomer(n:int,lamdis:str):
         raise Exception("\lambda distribution undefined")
     return R
 
+def to_unit(R,lamdis:str):
+    """Map rate parameters back to the unit cube, inverse of from_unit
+
+    Parameters
+    ----------
+    R : NDArray (n,5)
+        - Rate and Interaction Parameters
+    lamdis : str
+        - Sample distribution for lambda
+            - loguni
+            - uni
+
+    Returns
+    -------
+    U : NDArray (n,5)
+        - Points in [0,1]^5
+
+    Raises
+    ------
+    \lambda distribution undefined
+    """
+    U = np.array(R,dtype=float)
+    if lamdis=='loguni':
+        U[:,4] = np.log10(U[:,4])/4+0.5
+    elif lamdis=='uni':
+        U[:,4] = (U[:,4]-0.01)/99.99
+    else:
+        raise Exception("\lambda distribution undefined")
+    return U
+
+def chunk_seeds(n:int,chunk:int=100000,seed=None):
+    """Split n sets into chunks, each with its own independent random stream
+
+    Parameters
+    ----------
+    n : int
+        - Total no. of sets
+    chunk : int, optional
+        - Max no. of sets per chunk, by default 100000
+    seed : int or SeedSequence, optional
+        - Root seed the chunk streams are spawned from
+
+    Returns
+    -------
+    chunks : list of (int, SeedSequence)
+        - Size and seed of each chunk, the seed is None without a root seed
+    """
+    sizes = [min(chunk,n-i) for i in range(0,n,chunk)]
+    if seed is None:
+        return [(m,None) for m in sizes]
+    if not isinstance(seed,np.random.SeedSequence):
+        seed = np.random.SeedSequence(seed)
+    return list(zip(sizes,seed.spawn(len(sizes))))
+
+def randomer_chunks(n:int,lamdis:str,chunk:int=100000,seed=None):
+    """Generate random sets of rate parameters in chunks, see randomer
+
+    Parameters
+    ----------
+    n : int
+        - Total no. of sets to generate
+    lamdis : str
+        - Sample distribution for lambda
+            - loguni
+            - uni
+    chunk : int, optional
+        - Max no. of sets per chunk, by default 100000
+    seed : int or SeedSequence, optional
+        - Root seed, see chunk_seeds. Fresh entropy by default
+
+    Yields
+    ------
+    R : NDArray (chunk,5)
+        - Rate and Interaction Parameters, as returned by randomer
+    """
+    for m,ss in chunk_seeds(n,chunk,seed):
+        yield randomer(m,lamdis,ss)
+
+def chunker(R,chunk:int=100000):
+    """Split an already generated parameter array into chunks
+
+    Parameters
+    ----------
+    R : NDArray (n,5)
+        - Rate and Interaction Parameters
+    chunk : int, optional
+        - Max no. of sets per chunk, by default 100000
+
+    Yields
+    ------
+    R : NDArray (chunk,5)
+        - Consecutive rows of R
+    """
+    for i in range(0,len(R),chunk):
+        yield R[i:i+chunk]
+
+def sweep_axis(parm:str,n:int,lo:float=None,hi:float=None,scale:str='lin',lamdis:str='loguni'):
+    """Values of one axis of a grid sweep
+
+    Parameters
+    ----------
+    parm : str
+        - parameter, p / q / r / s / l
+    n : int
+        - No. of points
+    lo, hi : float, optional
+        - Range, both ends included. If not given the unit interval without 0
+          (k/n for k = 1..n) is mapped as in randomer, so rates run over (0,1]
+          and l over its lamdis range, as in parm_sweeper2D
+    scale : str, optional
+        - Spacing over [lo, hi]
+            - lin / evenly spaced (default)
+            - log / evenly spaced in log scale
+    lamdis : str, optional
+        - Sample distribution for lambda without lo, hi, see randomer
+
+    Returns
+    -------
+    v : NDArray (n,)
+        - Axis values
+
+    Raises
+    ------
+    Scale undefined
+    """
+    if lo is None and hi is None:
+        U=np.zeros((n,5))
+        U[:,'pqrsl'.index(parm)]=np.linspace(0,1,n+1)[1:]
+        return from_unit(U,lamdis)[:,'pqrsl'.index(parm)]
+    if scale=='lin':
+        return np.linspace(lo,hi,n)
+    elif scale=='log':
+        return np.geomspace(lo,hi,n)
+    else:
+        raise Exception("Scale undefined")
+
+class GridSweep:
+    """Cartesian product of parameter axes, generated lazily chunk by chunk
+
+    Only the axis values are stored, rows are built from their flat index, so
+    grids far larger than memory (e.g. 50^5 sets) can be streamed through the
+    solver. The first axis varies slowest.
+
+    Parameters
+    ----------
+    axes : list of tuple
+        - One entry per swept parameter, any subset of p, q, r, s, l
+            - (parm, n) / default range, see sweep_axis
+            - (parm, n, lo, hi) or (parm, n, lo, hi, scale) / explicit range
+            - (parm, values) / explicit values
+    lamdis : str, optional
+        - Sample distribution for lambda on a default range, see randomer
+    f_val : float, optional
+        - Value of the fixed rates, by default 1.0
+    l_val : float, optional
+        - Value of l if not swept, by default 1
+
+    Raises
+    ------
+    Parameter swept twice
+    """
+    def __init__(self,axes,lamdis:str='loguni',f_val:float=1.0,l_val=1):
+        self.parms=[a[0] for a in axes]
+        if len(set(self.parms))<len(self.parms):
+            raise Exception("Parameter swept twice")
+        self.values=[np.asarray(a[1],dtype=float) if np.ndim(a[1]) else sweep_axis(*a[:2],*a[2:],lamdis=lamdis) for a in axes]
+        self.shape=tuple(len(v) for v in self.values)
+        self.base=np.full(5,f_val,dtype=float)
+        self.base[4]=l_val
+
+    def __len__(self):
+        return int(np.prod(self.shape,dtype=np.int64))
+
+    def rows(self,a:int,b:int):
+        """Parameter sets a to b-1 of the grid
+
+        Returns
+        -------
+        R : NDArray (b-a,5)
+            - Rate and Interaction Parameters
+        """
+        b=min(b,len(self))
+        R=np.tile(self.base,(max(b-a,0),1))
+        idx=np.unravel_index(np.arange(a,b),self.shape)
+        for parm,v,ix in zip(self.parms,self.values,idx):
+            R[:,'pqrsl'.index(parm)]=v[ix]
+        return R
+
+    def chunks(self,chunk:int=100000):
+        """Yields the grid in consecutive chunks of at most chunk sets"""
+        for a in range(0,len(self),chunk):
+            yield self.rows(a,a+chunk)
+
+    def tasks(self,chunk:int=100000):
+        """Chunks as lightweight tasks, built only when solved, see sweep.run_parallel"""
+        return [GridChunk(self,a,min(a+chunk,len(self))) for a in range(0,len(self),chunk)]
+
+class GridChunk:
+    # Rows a to b-1 of a GridSweep, generated when called
+    def __init__(self,grid,a:int,b:int):
+        self.grid=grid
+        self.a=a
+        self.b=b
+
+    def __len__(self):
+        return self.b-self.a
+
+    def __call__(self):
+        return self.grid.rows(self.a,self.b)
+
 def parm_sweeper(n:int,parm:str,lamdis:str='loguni',f_val:float=1.0,l_val=1):
     """Generate parameters set R such that it sweeps over parameter parm with others being constant
 
@@ -109,23 +434,11 @@ def parm_sweeper(n:int,parm:str,lamdis:str='loguni',f_val:float=1.0,l_val=1):
     ------
     \lambda distribution undefined
     """
-    R = np.full((n,5),f_val)
-    p = np.linspace(0,1,n)
-    if parm == 'l':
-        if lamdis=='loguni':
-            # Converts \lambda to uniform in log scale over 0 to 100
-            R[:,4] = np.power(10,4*(p-0.5))
-        elif lamdis=='uni':
-            # Converts \lambda to uniform over 0 to 100
-            R[:,4] = 0.01 + 99.99*p
-        else:
-            raise Exception("\lambda distribution undefined")
-    else:
-        i = {'p':0 , 'q':1, 'r':2, 's':3}
-        i = i[parm]
-        R[:,i] = p
-        R[:,4] = np.full(n,l_val) 
-    return R
+    # Unit interval including 0, mapped as in randomer
+    U = np.zeros((n,5))
+    U[:,'pqrsl'.index(parm)] = np.linspace(0,1,n)
+    p = from_unit(U,lamdis)[:,'pqrsl'.index(parm)]
+    return GridSweep([(parm,p)],lamdis,f_val,l_val).rows(0,n)
 
 def parm_sweeper2D(n:int,parm,lamdis:str='loguni',f_val:float=1.0):
     """Generate parameters set R such that it sweeps over 2 parameters in parm with others being constant
@@ -162,26 +475,9 @@ def parm_sweeper2D(n:int,parm,lamdis:str='loguni',f_val:float=1.0):
     ------
     \lambda distribution undefined
     """
-    R = np.full((n**2,5),f_val)
-    p = np.linspace(0,1,n+1)
-    p=p[1:] # Drop 0
-    if ('l' in parm):
-        if lamdis=='loguni':
-            # Converts \lambda to uniform in log scale over 0 to 100
-            q = np.power(10,4*(p-0.5))
-        elif lamdis=='uni':
-            # Converts \lambda to uniform over 0 to 100
-            q = 0.01 + 99.99*p
-        else:
-            raise Exception("\lambda distribution undefined")
-    else:
-        q=p
-    i = {'p':0 , 'q':1, 'r':2, 's':3, 'l':4}
+    # Default axes over (0,1], the first parameter in alphabetical order varies fastest
     parm=sorted(parm)
-    parms=np.meshgrid(q,p)
-    for j in range(2):
-        R[:,i[parm[j]]] = parms[j].reshape(-1)  
-    return R
+    return GridSweep([(parm[1],n),(parm[0],n)],lamdis,f_val,f_val).rows(0,n**2)
 
 def markeig(TM,eps:float=0.001):
     """Finds & manipulates the eigenvector that satisfies the Markov property
@@ -202,6 +498,8 @@ def markeig(TM,eps:float=0.001):
     ------
     Eigenvector not found
     """
+    # Imported here so MM loads without scipy
+    from scipy.linalg import eig
     # Find all eigenvalues and eigenvectors of TM
     eval,evec = eig(TM) 
     # Magnitude of sum of sign is 4 if all are same. Except 0 prob??
@@ -219,7 +517,75 @@ def markeig(TM,eps:float=0.001):
     evec=evec.astype(float) #Temporary workaround 
     return evec
 
-def statechange(TM,s:int):
+def steady_state(TM,tol:float=1e-9):
+    """Finds the steady state probabilities of a batch of transition matrices
+
+    Uses the cofactor formula for the stationary vector: the probability of
+    state i is proportional to the principal minor of (I - TM) with row and
+    column i removed.
+
+    Parameters
+    ----------
+    TM : NDArray (n, 4, 4)
+        - Stack of transition matrices (a single (4, 4) matrix is also accepted)
+    tol : float, optional
+        - Largest residual |TM @ ev - ev| accepted as converged, by default 1e-9
+
+    Returns
+    -------
+    ev : NDArray (n, 4)
+        - Steady state probabilities, NaN for degenerate rows
+    ok : NDArray (n,) of bool
+        - False for rows without a unique steady state or with a residual above tol
+
+    Raises
+    ------
+    N/A
+    """
+    TM = np.asarray(TM,dtype=float)
+    single = TM.ndim==2
+    TM = TM.reshape(-1,4,4)
+    if backend()=='numba':
+        ev,ok = _kernels.steady_state(np.ascontiguousarray(TM),tol)
+        if single:
+            return ev[0],ok[0]
+        return ev,ok
+    # I - TM with the matrix axes first so each entry is a contiguous (n,) array
+    M = -np.ascontiguousarray(TM.transpose(1,2,0))
+    # Diagonal from the off-diagonal column sums to avoid cancellation in 1 - TM_ii
+    for i in range(4):
+        M[i,i] = TM[:,:,i].sum(axis=1)-TM[:,i,i]
+    # Principal 3x3 minors of I - TM, one per state
+    ev = np.empty((len(TM),4))
+    with np.errstate(invalid='ignore',divide='ignore'):
+        for i in range(4):
+            a,b,c = [j for j in range(4) if j!=i]
+            ev[:,i] = (M[a,a]*(M[b,b]*M[c,c]-M[b,c]*M[c,b])
+                -M[a,b]*(M[b,a]*M[c,c]-M[b,c]*M[c,a])
+                +M[a,c]*(M[b,a]*M[c,b]-M[b,b]*M[c,a]))
+        ev /= ev.sum(axis=1,keepdims=True)
+    # Check the result actually satisfies the Markov property
+    res = np.abs(np.einsum('nij,nj->ni',TM,ev)-ev).max(axis=1)
+    ok = np.isfinite(res) & (res<tol)
+    ev[~ok] = np.nan
+    if single:
+        return ev[0],ok[0]
+    return ev,ok
+
+_default_rng=None
+
+def _step_rng(rng):
+    # Per step callers must not reseed, an int would give the same draw every step
+    global _default_rng
+    if rng is None:
+        if _default_rng is None:
+            _default_rng=np.random.default_rng()
+        return _default_rng
+    if not isinstance(rng,np.random.Generator):
+        raise Exception("rng is not a Generator")
+    return rng
+
+def statechange(TM,s:int,rng:np.random.Generator=None):
     """Advances the Markov chain to state at next time step
     
     Parameters
@@ -228,6 +594,10 @@ def statechange(TM,s:int):
         - Transition matrix
     s : int
         - Current state number [@ t_i)]
+    rng : Generator, optional
+        - Source of randomness, created once by the caller with
+          np.random.default_rng and reused over steps. By default a module
+          wide Generator seeded from fresh entropy on first use
 
     Returns
     -------
@@ -236,7 +606,7 @@ def statechange(TM,s:int):
 
     Raises
     ------
-    N/A
+    rng is not a Generator
     """
     # Define state space
     states=np.array([[1,0,0,0],[0,1,0,0],[0,0,1,0],[0,0,0,1]])
@@ -245,10 +615,10 @@ def statechange(TM,s:int):
     # Advance markov chain to next step
     S=TM@S 
     # Collapse to particular state number depending on probability
-    s=np.random.choice(4,p=S)
+    s=_step_rng(rng).choice(4,p=S)
     return s
 
-def timeseries(tmax:int,TM):
+def timeseries(tmax:int,TM,rng=None):
     """Generates a time-series of states for the provided Markov chain 
 
     Parameters
@@ -257,6 +627,8 @@ def timeseries(tmax:int,TM):
         - No. of timestep iterations to make
     TM : NDArray (4, 4)
         - Transition matrix
+    rng : int, SeedSequence or Generator, optional
+        - Source of randomness, fresh entropy by default
 
     Returns
     -------
@@ -267,10 +639,272 @@ def timeseries(tmax:int,TM):
     ------
     N/A
     """
-    # Get a random initial state
-    s=np.random.randint(4)
-    TS=np.array([[0,s]])
-    for t in range(tmax):
-        s=statechange(TM,s)
-        TS=np.append(TS,[[t+1,s]],axis=0)
-    return TS
\ No newline at end of file
+    # Simulate a single chain from a random initial state
+    s=simulate(TM,tmax,rng=rng)[0]
+    TS=np.column_stack((np.arange(tmax+1),s))
+    return TS
+
+def _compose_table():
+    """Lookup table for composing maps of the 4 states onto themselves
+
+    A map f is packed in a byte, with f(j) stored in bits 2j and 2j+1.
+
+    Returns
+    -------
+    comp : NDArray (256, 256) of uint8
+        - comp[f,g] is the packed map f(g(j))
+    """
+    f = np.arange(256)[:,None]
+    g = np.arange(256)[None,:]
+    comp = np.zeros((256,256),dtype=np.uint8)
+    for j in range(4):
+        gj = (g>>(2*j))&3
+        comp |= (((f>>(2*gj))&3)<<(2*j)).astype(np.uint8)
+    return comp
+
+_COMP = _compose_table()
+_IDENT = 0b11100100 # Packed identity map
+
+def _advance(F,s0,w:int=64):
+    """Applies a sequence of packed state maps to the initial states
+
+    Maps are composed in blocks of w steps, the block start states found
+    recursively, so the work is vectorized over time as well as chains.
+
+    Parameters
+    ----------
+    F : NDArray (n, L) of uint8
+        - Packed map from current to next state, per chain and time step
+    s0 : NDArray (n,) of uint8
+        - Initial state of each chain
+    w : int, optional
+        - Block length, by default 64
+
+    Returns
+    -------
+    S : NDArray (n, L) of uint8
+        - State of each chain after each step
+    """
+    n,L = F.shape
+    if L<=w:
+        S = np.empty((n,L),dtype=np.uint8)
+        s = s0
+        for t in range(L):
+            s = (F[:,t]>>(2*s))&3
+            S[:,t] = s
+        return S
+    m = -(-L//w)
+    # Pad with identity maps to whole blocks
+    P = np.full((n,m*w),_IDENT,dtype=np.uint8)
+    P[:,:L] = F
+    P = P.reshape(n,m,w)
+    # Prefix compositions within each block
+    for k in range(1,w):
+        P[:,:,k] = _COMP[P[:,:,k],P[:,:,k-1]]
+    # States at the start of each block from the composed blocks
+    starts = np.empty((n,m),dtype=np.uint8)
+    starts[:,0] = s0
+    starts[:,1:] = _advance(P[:,:-1,w-1],s0,w)
+    S = (P>>(2*starts[:,:,None]))&3
+    return S.reshape(n,m*w)[:,:L]
+
+def simulate(TM,tmax:int,n:int=1,s0=None,chunk:int=2**22,rng=None):
+    """Generates time-series of states for many independent Markov chains in lockstep
+
+    Parameters
+    ----------
+    TM : NDArray (4, 4) or (n, 4, 4)
+        - Transition matrix shared by n replicate chains, or one per chain
+    tmax : int
+        - No. of timestep iterations to make
+    n : int, optional
+        - No. of replicate chains for a single TM, by default 1
+    s0 : NDArray (n,), optional
+        - Initial states, random by default
+    chunk : int, optional
+        - Max no. of chain steps drawn at once, bounds the working memory
+    rng : int, SeedSequence, Generator or list, optional
+        - Source of randomness, fresh entropy by default. A list gives one
+          seed or Generator per chain, each chain then draws only from its own
+          stream and its trajectory does not depend on chunk or on which
+          other chains it is simulated with
+
+    Returns
+    -------
+    S : NDArray (n, tmax+1) of int8
+        - State of each chain (row) at each time (column)
+
+    Raises
+    ------
+    N/A
+    """
+    TM = np.asarray(TM,dtype=float)
+    if TM.ndim==2:
+        TM = TM[None]
+    else:
+        n = len(TM)
+    # Cumulative distribution of the next state for each current state
+    C = np.cumsum(TM,axis=1)
+    if isinstance(rng,(list,tuple)):
+        n = len(rng)
+        rngs = [np.random.default_rng(g) for g in rng]
+        draw = lambda m: np.stack([g.random(m) for g in rngs])
+        if s0 is None:
+            s0 = [g.integers(4) for g in rngs]
+    else:
+        rng = np.random.default_rng(rng)
+        draw = lambda m: rng.random((n,m))
+        if s0 is None:
+            s0 = rng.integers(4,size=n)
+    s = np.broadcast_to(np.asarray(s0,dtype=np.uint8),(n,)).copy()
+    S = np.empty((n,tmax+1),dtype=np.int8)
+    S[:,0] = s
+    L = max(1,chunk//n)
+    for t0 in range(0,tmax,L):
+        U = draw(min(L,tmax-t0))
+        if backend()=='numba':
+            # Steps each chain in a compiled loop, same states as below
+            _kernels.chain_steps(np.broadcast_to(C,(n,4,4)),s,U,S[:,t0+1:t0+1+U.shape[1]])
+            continue
+        # Next state for every possible current state, packed into one byte
+        F = np.zeros(U.shape,dtype=np.uint8)
+        for j in range(4):
+            nxt = np.zeros(U.shape,dtype=np.uint8)
+            for i in range(3):
+                nxt += U>C[:,i,j,None]
+            F |= nxt<<(2*j)
+        St = _advance(F,s)
+        S[:,t0+1:t0+1+U.shape[1]] = St
+        s = St[:,-1]
+    return S
+
+def _simulate_task(args):
+    TM,tmax,seeds = args
+    return simulate(TM,tmax,rng=seeds)
+
+def simulate_parallel(TM,tmax:int,n:int=1,seed=None,workers:int=None):
+    """Simulates independent chains on a process pool, see simulate
+
+    Every chain gets its own stream spawned from seed, so the output is
+    bit-identical for any no. of workers.
+
+    Parameters
+    ----------
+    TM : NDArray (4, 4) or (n, 4, 4)
+        - Transition matrix shared by n replicate chains, or one per chain
+    tmax : int
+        - No. of timestep iterations to make
+    n : int, optional
+        - No. of replicate chains for a single TM, by default 1
+    seed : int or SeedSequence, optional
+        - Root seed the chain streams are spawned from
+    workers : int, optional
+        - No. of worker processes, all cores by default
+
+    Returns
+    -------
+    S : NDArray (n, tmax+1) of int8
+        - State of each chain (row) at each time (column)
+
+    Raises
+    ------
+    N/A
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    TM = np.asarray(TM,dtype=float)
+    if TM.ndim==3:
+        n = len(TM)
+    if not isinstance(seed,np.random.SeedSequence):
+        seed = np.random.SeedSequence(seed)
+    seeds = seed.spawn(n)
+    workers = workers or os.cpu_count()
+    groups = np.array_split(np.arange(n),min(workers,n))
+    tasks = [(TM if TM.ndim==2 else TM[g],tmax,[seeds[k] for k in g]) for g in groups]
+    with ProcessPoolExecutor(workers) as ex:
+        S = np.concatenate(list(ex.map(_simulate_task,tasks)))
+    return S
+
+def simulate_rle(TM,tmax:int,s0=None,rng=None):
+    """Event-driven simulation of one chain, returning only the state changes
+
+    The no. of steps spent in state j is geometric with success probability
+    1 - TM[j,j], so the chain jumps straight from one state change to the
+    next. The jump chain and the holding times are drawn in vectorized
+    batches, the work scales with the no. of state changes, not with tmax.
+
+    Parameters
+    ----------
+    TM : NDArray (4, 4)
+        - Transition matrix
+    tmax : int
+        - No. of timestep iterations to make
+    s0 : int, optional
+        - Initial state, random by default
+    rng : int, SeedSequence or Generator, optional
+        - Source of randomness, fresh entropy by default
+
+    Returns
+    -------
+    start : NDArray (k,) of int64
+        - Time step at which each run starts, start[0] is 0
+    state : NDArray (k,) of int8
+        - State of each run, held until the next start (or tmax)
+
+    Raises
+    ------
+    N/A
+    """
+    rng = np.random.default_rng(rng)
+    TM = np.asarray(TM,dtype=float)
+    stay = np.diag(TM).copy()
+    leave = 1-stay
+    absorbing = leave<=0
+    # Jump chain, where to go on leaving each state
+    J = TM.copy()
+    J[np.diag_indices(4)] = 0
+    with np.errstate(invalid='ignore',divide='ignore'):
+        J /= leave
+    J[:,absorbing] = 0
+    J[absorbing,absorbing] = 1
+    if s0 is None:
+        s0 = rng.integers(4)
+    starts = [np.zeros(1,dtype=np.int64)]
+    states = [np.array([s0],dtype=np.int8)]
+    t = 0
+    s = s0
+    while True:
+        # Expected no. of changes left, with some slack
+        m = int(1.2*(tmax-t)*leave[~absorbing].max(initial=0))+16
+        seq = simulate(J,m,s0=s,rng=rng)[0]
+        held = seq[:-1]
+        dwell = np.full(m,tmax+1,dtype=np.int64)
+        go = ~absorbing[held]
+        dwell[go] = rng.geometric(leave[held[go]])
+        tn = t+np.cumsum(dwell)
+        k = np.searchsorted(tn,tmax,side='right')
+        starts.append(tn[:k])
+        states.append(seq[1:k+1])
+        if k<m:
+            break
+        t,s = tn[-1],seq[-1]
+    return np.concatenate(starts),np.concatenate(states)
+
+def rle_expand(start,state,tmax:int):
+    """Expands a run-length encoded trajectory to the state at every time step
+
+    Parameters
+    ----------
+    start : NDArray (k,) of int
+        - Time step at which each run starts
+    state : NDArray (k,) of int
+        - State of each run
+    tmax : int
+        - Last time step
+
+    Returns
+    -------
+    S : NDArray (tmax+1,) of int8
+        - State at each time step
+    """
+    lengths = np.diff(np.append(start,tmax+1))
+    return np.repeat(np.asarray(state,dtype=np.int8),lengths)
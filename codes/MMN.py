@@ -0,0 +1,232 @@
+import inspect
+import numpy as np
+from scipy.sparse.linalg import LinearOperator, gmres
+
+def gene_states(N:int):
+    """On/off state of every gene in every state of an N gene circuit
+
+    Parameters
+    ----------
+    N : int
+        - No. of genes
+
+    Returns
+    -------
+    X : NDArray (2^N, N) of float
+        - X[s,g] is 1 if gene g is on in state s, i.e. bit g of s. For N=2 this
+          is State%2 and State//2 as used in the analysis
+    """
+    s=np.arange(2**N)
+    return ((s[:,None]>>np.arange(N))&1).astype(float)
+
+def gene_parms(R,N:int):
+    """Per gene rates and pairwise interactions from a shared parameter set
+
+    Parameters
+    ----------
+    R : NDArray (5,)
+        - Rate and Interaction Parameters, as for MM.T, shared by all genes
+    N : int
+        - No. of genes
+
+    Returns
+    -------
+    rates : NDArray (N,4)
+        - p, q, r, s of each gene
+    lam : NDArray (N,N)
+        - lam[g,h] interaction of gene h on gene g, all to all
+    """
+    R=np.asarray(R,dtype=float)
+    rates=np.tile(R[:4],(N,1))
+    lam=np.full((N,N),R[4])
+    return rates,lam
+
+def reference_matrix(rates,lam=None):
+    """Transition matrix of N interacting genes built state by state from the rule
+
+    A direct loop over all pairs of states, O(N^2 4^N), to check
+    TransitionOperator against for small N.
+
+    Parameters
+    ----------
+    rates : NDArray (N,4)
+        - p, q, r, s of each gene
+    lam : NDArray (N,N), optional
+        - Positive interactions, diagonal ignored. No interactions by default
+
+    Returns
+    -------
+    TM : NDArray (2^N, 2^N)
+        - TM[y,x] probability of going from state x to state y
+    """
+    rates=np.asarray(rates,dtype=float)
+    N=len(rates)
+    lam=np.ones((N,N)) if lam is None else np.asarray(lam,dtype=float)
+    X=gene_states(N).astype(int)
+    TM=np.empty((2**N,2**N))
+    for x in range(2**N):
+        for y in range(2**N):
+            w=1.0
+            for g in range(N):
+                p,q,r,s=rates[g]
+                w*=[[p,s],[r,q]][X[x,g]][X[y,g]]
+                if X[x,g] and X[y,g]:
+                    # Stays on, coupled to every partner on before or after
+                    for h in range(N):
+                        if h!=g and (X[x,h] or X[y,h]):
+                            w*=lam[g,h]
+            TM[y,x]=w
+    return TM/TM.sum(axis=0)
+
+class TransitionOperator(LinearOperator):
+    """Transition matrix of N interacting genes, applied without storing it
+
+    Each gene switches as in MM.T: off->off p, off->on s, on->off r and
+    on->on q. A gene that stays on is multiplied by lam[g,h] for every partner
+    h that is on before or after the step, and each column is normalized. For
+    N=2 this is exactly MM.T.
+
+    The uncoupled part is the Kronecker product of the per gene 2x2 factors,
+    the couplings are bilinear in the gene states, so blocks of columns are
+    built from a few small matrix products. They are computed once and kept
+    while the 4^N matrix fits in max_bytes, so each product is a dense
+    matvec; beyond that every product rebuilds the blocks, exp included, at
+    several times the cost. Without interactions (all lam 1) the operator is
+    applied one gene at a time in O(N 2^N). Matches reference_matrix.
+
+    Parameters
+    ----------
+    rates : NDArray (N,4)
+        - p, q, r, s of each gene
+    lam : NDArray (N,N), optional
+        - Positive interactions, diagonal ignored. No interactions by default
+    block : int, optional
+        - No. of columns built at once, by default 256
+    max_bytes : int, optional
+        - Largest matrix kept in memory with interactions, by default 2^30
+          (N <= 13)
+    """
+    def __init__(self,rates,lam=None,block:int=256,max_bytes:int=2**30):
+        rates=np.asarray(rates,dtype=float)
+        self.N=N=len(rates)
+        self.block=block
+        p,q,r,s=rates.T
+        # A[g][y,x] weight of gene g going from x to y
+        self.A=np.stack([np.stack([p,r],axis=1),np.stack([s,q],axis=1)],axis=1)
+        L=np.zeros((N,N)) if lam is None else np.log(np.asarray(lam,dtype=float))
+        L[np.diag_indices(N)]=0
+        self.L=L
+        self.X=gene_states(N)
+        self.coupled=bool(L.any())
+        super().__init__(float,(2**N,2**N))
+        if self.coupled:
+            self.Y2=(self.X[:,:,None]*self.X[:,None,:]).reshape(2**N,-1)
+            self.YLY=self.X*(self.X@L.T)
+            if 8*4**N<=max_bytes:
+                # Normalized weights of every transition, W[x,y] = TM[y,x]
+                self.W=np.concatenate(list(self._blocks()))
+                self.c=self.W.sum(axis=1)
+                self.W/=self.c[:,None]
+            else:
+                self.W=None
+                self.c=np.concatenate([W.sum(axis=1) for W in self._blocks()])
+        else:
+            self.An=self.A/self.A.sum(axis=1,keepdims=True)
+
+    def _kron_cols(self,Xb):
+        # Columns of the Kronecker product of the per gene factors, one row per state in Xb
+        B=len(Xb)
+        K=np.ones((B,1))
+        for g in reversed(range(self.N)):
+            a=self.A[g][:,Xb[:,g].astype(int)].T # (B,2)
+            K=(K[:,:,None]*a[:,None,:]).reshape(B,-1)
+        return K
+
+    def _blocks(self):
+        # Unnormalized weights W[x,y] for consecutive blocks of initial states x
+        L,Y=self.L,self.X
+        for i in range(0,2**self.N,self.block):
+            Xb=self.X[i:i+self.block]
+            # Coupling exponent: sum_g x_g y_g sum_h L_gh (x_h or y_h)
+            C=(Xb*(Xb@L.T))@Y.T+Xb@self.YLY.T
+            X2=(Xb[:,:,None]*Xb[:,None,:]*L).reshape(len(Xb),-1)
+            C-=X2@self.Y2.T
+            yield self._kron_cols(Xb)*np.exp(C)
+
+    def _matvec(self,v):
+        v=np.asarray(v,dtype=float).reshape(-1)
+        if not self.coupled:
+            # Apply the normalized per gene factors along each gene axis
+            t=v.reshape((2,)*self.N)
+            for g in range(self.N):
+                axis=self.N-1-g # Gene g is bit g, the last axis is bit 0
+                t=np.moveaxis(np.tensordot(self.An[g],t,axes=([1],[axis])),0,axis)
+            return t.reshape(-1)
+        if self.W is not None:
+            return v@self.W
+        w=v/self.c
+        out=np.zeros(2**self.N)
+        for i,W in zip(range(0,2**self.N,self.block),self._blocks()):
+            out+=w[i:i+self.block]@W
+        return out
+
+    def dense(self):
+        """Full 2^N x 2^N transition matrix, only sensible for small N"""
+        if not self.coupled:
+            return self._matmat(np.eye(2**self.N))
+        if self.W is not None:
+            return self.W.T.copy()
+        W=np.concatenate(list(self._blocks()))
+        return (W/self.c[:,None]).T
+
+def stationary(op,method:str='power',tol:float=1e-12,maxiter:int=100000,x0=None):
+    """Steady state of a transition operator by iterative methods
+
+    Parameters
+    ----------
+    op : TransitionOperator or NDArray (S,S)
+        - Column stochastic transition operator
+    method : str, optional
+        - Iterative method
+            - power / power iteration (default)
+            - gmres / GMRES on (I - TM + u 1^T) pi = u, u uniform
+    tol : float, optional
+        - Tolerance on the residual |TM pi - pi|_1, by default 1e-12
+    maxiter : int, optional
+        - Max no. of iterations, by default 100000
+    x0 : NDArray (S,), optional
+        - Initial guess, uniform by default
+
+    Returns
+    -------
+    pi : NDArray (S,)
+        - Steady state probabilities
+    ok : bool
+        - Whether the residual is within tol
+
+    Raises
+    ------
+    Method undefined
+    """
+    S=op.shape[0]
+    matvec=op.matvec if isinstance(op,LinearOperator) else op.dot
+    pi=np.full(S,1/S) if x0 is None else np.asarray(x0,dtype=float)/np.sum(x0)
+    if method=='power':
+        for i in range(maxiter):
+            new=matvec(pi)
+            new/=new.sum()
+            if np.abs(new-pi).sum()<tol:
+                pi=new
+                break
+            pi=new
+    elif method=='gmres':
+        u=np.full(S,1/S)
+        A=LinearOperator((S,S),matvec=lambda v: v-matvec(v)+u*v.sum(),dtype=float)
+        # Absolute tolerance only, the keyword for the relative one changed between scipy versions
+        rel='rtol' if 'rtol' in inspect.signature(gmres).parameters else 'tol'
+        pi,info=gmres(A,u,x0=pi,atol=tol/np.sqrt(S),maxiter=maxiter,**{rel:0})
+        pi/=pi.sum()
+    else:
+        raise Exception("Method undefined")
+    ok=np.abs(matvec(pi)-pi).sum()<10*tol
+    return pi,bool(ok)
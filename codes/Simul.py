@@ -1,15 +1,41 @@
 import numpy as np
 import pandas as pd
-from MM import T, randomer, timeseries
+from MM import T, randomer, simulate, simulate_rle
+from traj import TrajWriter, rle_chunks
 
 ## Input Parameters
 t_max=1000 # Maximum time steps to simulate for 
-fname='uni-sim.csv' # Filename to save as
+seed=None # Root seed for a reproducible run, fresh entropy if None
+rle=False # Save only the state changes (event-driven simulation) instead of every step
+fname='uni-sim.traj' # Filename to save as, .traj (bit-packed, see traj.py) or .csv
+seg=2**24 # Time steps simulated at once when writing .traj
 
 fname='../raw_output/'+fname
-RS=randomer(1)
+rs_seed,ts_seed=np.random.SeedSequence(seed).spawn(2) # Independent streams for parameters and chain
+RS=randomer(1,'uni',rs_seed)
 tm=T(RS[0])
 
-ts=timeseries(t_max,tm)
-ts=pd.DataFrame(ts,columns=['Time','State'])
-ts.to_csv(fname,index=False)
+if fname.endswith('.traj'):
+    # Stream the chain to disk a segment at a time, every step takes 2 bits
+    with TrajWriter(fname) as w:
+        if rle:
+            t,s=simulate_rle(tm,t_max,rng=ts_seed)
+            for piece in rle_chunks(t,s,t_max,seg):
+                w.write(piece)
+        else:
+            rng=np.random.default_rng(ts_seed)
+            s=simulate(tm,min(seg,t_max),rng=rng)[0]
+            w.write(s)
+            for a in range(seg,t_max,seg):
+                s=simulate(tm,min(seg,t_max-a),s0=s[-1:],rng=rng)[0]
+                w.write(s[1:]) # First state is the last one written
+else:
+    if rle:
+        t,s=simulate_rle(tm,t_max,rng=ts_seed) # Time of each state change and the new state
+        if t[-1]<t_max:
+            t,s=np.append(t,t_max),np.append(s,s[-1]) # Close the last run at t_max
+    else:
+        s=simulate(tm,t_max,rng=ts_seed)[0] # Single chain of states
+        t=np.arange(t_max+1)
+    ts=pd.DataFrame({'Time':t,'State':s})
+    ts.to_csv(fname,index=False)
@@ -0,0 +1,69 @@
+import numpy as np
+from scipy.spatial import cKDTree
+from MM import from_unit
+from sweep import solve_chunk
+from categories import categorize, cats
+
+def _reflect(U):
+    # Fold points back into the unit cube
+    U=np.abs(U)%2
+    return 1-np.abs(1-U)
+
+def adaptive_sample(n0:int,lamdis:str,rounds:int=10,n_round:int=None,cats=cats,eps:float=0.1,k:int=8,scale:float=0.05,rng=None):
+    """Sample the parameter space with new points concentrated on category boundaries
+
+    Starts from a uniform batch as randomer does, then each round jitters
+    points whose k nearest neighbours (in the unit cube randomer samples)
+    fall in a different category, halving the jitter every round.
+
+    Parameters
+    ----------
+    n0 : int
+        - No. of sets in the initial uniform batch
+    lamdis : str
+        - Sample distribution for lambda, see randomer
+    rounds : int, optional
+        - No. of refinement rounds, by default 10
+    n_round : int, optional
+        - No. of new sets per round, by default n0
+    cats : list of str, optional
+        - Categories, see categories.categorize
+    eps : float, optional
+        - Tolerance around the category boundaries, by default 0.1
+    k : int, optional
+        - No. of neighbours compared, by default 8
+    scale : float, optional
+        - Initial standard deviation of the jitter, by default 0.05
+    rng : int, SeedSequence or Generator, optional
+        - Source of randomness, fresh entropy by default
+
+    Returns
+    -------
+    y : NDArray (n,9)
+        - Rates and respective steady state probabilities, as from solve_chunk
+    c : NDArray (n,) of int
+        - Category of each set, see categories.categorize
+
+    Raises
+    ------
+    N/A
+    """
+    rng=np.random.default_rng(rng)
+    n_round=n_round or n0
+    U=rng.random((n0,5))
+    y=solve_chunk(from_unit(U,lamdis))
+    c=categorize(y[:,5],y[:,8],cats,eps)
+    for i in range(rounds):
+        # Points with a neighbour of another category lie near a boundary
+        idx=cKDTree(U).query(U,k+1)[1][:,1:]
+        front=np.flatnonzero((c[idx]!=c[:,None]).any(axis=1))
+        if len(front)==0:
+            break
+        parents=U[rng.choice(front,n_round)]
+        Un=_reflect(parents+rng.normal(0,scale,parents.shape))
+        yn=solve_chunk(from_unit(Un,lamdis))
+        U=np.concatenate((U,Un))
+        y=np.concatenate((y,yn))
+        c=np.concatenate((c,categorize(yn[:,5],yn[:,8],cats,eps)))
+        scale/=2
+    return y,c
@@ -0,0 +1,218 @@
+import os
+import sys
+import time
+import argparse
+from itertools import combinations
+import numpy as np
+from MM import GridSweep, randomer
+from sweep import write_sweep, random_tasks, run_parallel, solve_chunk, _solve_task
+import prof
+
+root=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+parms=('p','q','r','s','l')
+row_bytes={'.csv':127,'.npy':72,'.parquet':72,'.feather':72} # Approximate bytes per output row
+
+def parse_axis(text:str):
+    # parm:n or parm:n:lo:hi or parm:n:lo:hi:scale, see GridSweep
+    a=text.split(':')
+    if len(a) not in (2,4,5) or a[0] not in parms:
+        raise argparse.ArgumentTypeError('axis must be parm:n[:lo:hi[:scale]]')
+    return (a[0],int(a[1]))+tuple(float(x) for x in a[2:4])+tuple(a[4:])
+
+def sweep_jobs(mode:str,n:int,chunk:int=100000,ext:str='.csv',out:str=None,parms=parms,lamdis=('loguni','uni'),seed=None,axes=None):
+    """Tasks and output files of the sweeps of one mode
+
+    Parameters
+    ----------
+    mode : str
+        - Kind of sweep
+            - 1d / each parameter in parms on its own, see parm_sweeper
+            - 2d / each pair of parameters in parms, see parm_sweeper2D
+            - grid / one grid over axes, any subset of the parameters, written to
+              grid-<parms>, or grid-<parms>-<lamdis> for each lamdis if l has its default range
+            - random / random parameter sets for each distribution in lamdis
+    n : int
+        - No. of parameter sets, per axis for 1d and 2d, in total for random
+    chunk : int, optional
+        - Max no. of parameter sets per task, by default 100000
+    ext : str, optional
+        - Output format, see write_sweep
+    out : str, optional
+        - Output directory, raw_output of the repo by default
+    parms : tuple of str, optional
+        - Swept parameters for 1d and 2d
+    lamdis : tuple of str, optional
+        - Sample distributions for lambda for random and for a default l axis of grid, see randomer
+    seed : int, optional
+        - Root seed for random, each distribution gets its own stream
+    axes : list of tuple, optional
+        - Axes of the grid mode, see GridSweep
+
+    Returns
+    -------
+    jobs : list of (list, str)
+        - Tasks and output file of each sweep, see run_parallel
+
+    Raises
+    ------
+    Sweep mode undefined
+    """
+    out=out or os.path.join(root,'raw_output')
+    jobs=[]
+    # Grid tasks only hold their index range, rows are built when solved
+    if mode=='1d':
+        for parm in parms:
+            # parm_sweeper(n) without its first point, where the rate is 0
+            jobs.append((GridSweep([(parm,n-1)]).tasks(chunk),os.path.join(out,'sweep-'+parm+ext)))
+    elif mode=='2d':
+        for parm in combinations(parms,2):
+            # Same points and order as parm_sweeper2D
+            a,b=sorted(parm)
+            jobs.append((GridSweep([(b,n),(a,n)]).tasks(chunk),os.path.join(out,'sweep-'+''.join(parm)+ext)))
+    elif mode=='grid':
+        # Own prefix so a grid never overwrites the 1d / 2d sweep-* files, one grid per lamdis if l has its default range
+        name='grid-'+''.join(a[0] for a in axes)
+        if any(a[0]=='l' and len(a)==2 and not np.ndim(a[1]) for a in axes):
+            for dist in lamdis:
+                jobs.append((GridSweep(axes,dist).tasks(chunk),os.path.join(out,name+'-'+dist+ext)))
+        else:
+            jobs.append((GridSweep(axes).tasks(chunk),os.path.join(out,name+ext)))
+    elif mode=='random':
+        for i,parm in enumerate(lamdis):
+            # Chunks drawn from their own seeds, so the output is the same serial or parallel
+            jobs.append((random_tasks(n,parm,chunk,None if seed is None else [seed,i]),os.path.join(out,parm+ext)))
+    else:
+        raise Exception("Sweep mode undefined")
+    return jobs
+
+def job_size(tasks):
+    # No. of parameter sets in a job's tasks
+    return sum(t[0] if isinstance(t,tuple) else len(t) for t in tasks)
+
+def run_jobs(jobs,workers:int=1):
+    """Solves and writes every sweep, in process or on a pool of workers
+
+    Parameters
+    ----------
+    jobs : list of (list, str)
+        - Tasks and output file of each sweep, see sweep_jobs
+    workers : int, optional
+        - No. of worker processes, 1 solves in this process, by default 1
+
+    Returns
+    -------
+    n : list of int
+        - No. of rows written for each sweep
+    """
+    if workers!=1:
+        return run_parallel(jobs,workers)
+    n=[]
+    for tasks,fname in jobs:
+        results=(_solve_task(t) for t in tasks)
+        n.append(write_sweep(results,fname,job_size(tasks)))
+    return n
+
+def estimate(jobs,workers:int=1,sample:int=10000):
+    """Predicted rows, output size and run time of each sweep, nothing is written
+
+    The solve rate is measured on a sample of random parameter sets.
+
+    Returns
+    -------
+    est : list of (str, int, float, float)
+        - Output file, no. of rows, size in bytes and time in seconds
+    """
+    R=randomer(sample,'loguni',0)
+    t=time.perf_counter()
+    solve_chunk(R)
+    rate=sample/(time.perf_counter()-t)*(workers or os.cpu_count())
+    est=[]
+    for tasks,fname in jobs:
+        m=job_size(tasks)
+        est.append((fname,m,m*row_bytes.get(os.path.splitext(fname)[1],72),m/rate))
+    return est
+
+def boundary_table(parms,curves=('coor','indep','semi','comp'),R0=(0.5,0.5,0.5,0.5,10),lamdis:str='loguni',eps:float=0.1):
+    # Crossings of one parameter or traced curves of two, for every boundary
+    import pandas as pd
+    from boundary import crossings, trace
+    if len(parms)==1:
+        return pd.concat([crossings(parms[0],c,R0,lamdis,eps) for c in curves],ignore_index=True)
+    return pd.concat([trace(parms,c,R0,lamdis,eps) for c in curves],ignore_index=True)
+
+def main(argv=None):
+    parser=argparse.ArgumentParser(prog='arme',description='Steady state parameter sweeps of the aRME Markov chain model')
+    sub=parser.add_subparsers(dest='command',required=True)
+    sp=sub.add_parser('sweep',help='Solve a parameter sweep and write it to raw_output')
+    sp.add_argument('--mode',nargs='+',choices=('random','1d','2d','grid'),required=True,help='Kind of sweep, several run one after another')
+    sp.add_argument('--axis',action='append',type=parse_axis,default=None,help='Axis of the grid mode, parm:n[:lo:hi[:lin|log]], repeat for more axes (first varies slowest)')
+    sp.add_argument('--n',type=int,default=None,help='No. of parameter sets, per axis for 1d/2d (default 100), in total for random (default 100000)')
+    sp.add_argument('--parms',nargs='+',choices=parms,default=parms,help='Swept parameters for 1d/2d')
+    sp.add_argument('--lamdis',nargs='+',choices=('loguni','uni'),default=('loguni','uni'),help='Lambda distributions for random and a default l axis of grid')
+    sp.add_argument('--seed',type=int,default=None,help='Root seed for random, fresh entropy by default')
+    sp.add_argument('--workers',type=int,default=1,help='No. of worker processes, 0 for all cores, by default 1')
+    sp.add_argument('--format',choices=('csv','npy','parquet','feather'),default=None,help='Output format, by default csv for 1d/2d and npy for random')
+    sp.add_argument('--chunk',type=int,default=100000,help='Max no. of parameter sets solved at once')
+    sp.add_argument('--out',default=None,help='Output directory, by default raw_output')
+    sp.add_argument('--dry-run',action='store_true',help='Only print the rows, output size and estimated time of each sweep')
+    sp.add_argument('--profile',nargs='?',const='',default=None,help='Print per stage timings, optionally dumping a cProfile (or .html pyinstrument) file')
+    bp=sub.add_parser('boundary',help='Locate category boundaries along one parameter or trace them over two')
+    bp.add_argument('parms',nargs='+',choices=parms,help='One or two swept parameters')
+    bp.add_argument('--curve',nargs='+',choices=('coor','indep','semi','comp'),default=('coor','indep','semi','comp'),help='Boundaries, by default all, see boundary.residual')
+    bp.add_argument('--fixed',nargs=5,type=float,default=(0.5,0.5,0.5,0.5,10),metavar=('P','Q','R','S','L'),help='Fixed parameters, by default 0.5 0.5 0.5 0.5 10. With L 1 every point lies on indep')
+    bp.add_argument('--lamdis',choices=('loguni','uni'),default='loguni',help='Scale of lambda')
+    bp.add_argument('--eps',type=float,default=0.1,help='Tolerance of the categories')
+    bp.add_argument('--out',default=None,help='Output directory, by default raw_output')
+    sa=sub.add_parser('sensitivity',help='Sobol indices of the steady state and the categories from a Saltelli design')
+    sa.add_argument('--m',type=int,default=12,help='Base sample of 2^m points, 2^m x 7 solves')
+    sa.add_argument('--lamdis',choices=('loguni','uni'),default='loguni',help='Sample distribution for lambda')
+    sa.add_argument('--boot',type=int,default=200,help='No. of bootstrap resamples for the confidence intervals')
+    sa.add_argument('--seed',type=int,default=None,help='Seed of the design and the bootstrap')
+    sa.add_argument('--out',default=None,help='Also write the table to this csv')
+    a=parser.parse_args(argv)
+    if a.command=='sensitivity':
+        from sensitivity import sobol_indices
+        df=sobol_indices(a.m,a.lamdis,n_boot=a.boot,seed=a.seed)
+        print(df.round(3).to_string())
+        if a.out:
+            df.to_csv(a.out)
+        return
+    if a.command=='boundary':
+        if len(a.parms)>2:
+            parser.error('boundary takes one or two parameters')
+        out=a.out or os.path.join(root,'raw_output')
+        fname=os.path.join(out,'boundary-'+''.join(a.parms)+'.csv')
+        df=boundary_table(a.parms,a.curve,a.fixed,a.lamdis,a.eps)
+        if not len(df):
+            sys.exit('No boundary crossed along %s with these fixed parameters, try other --fixed or --curve'%' and '.join(a.parms))
+        os.makedirs(out,exist_ok=True)
+        df.to_csv(fname,index=False)
+        print('%d boundary points in %s'%(len(df),fname),file=sys.stderr)
+        return
+    if a.profile is not None:
+        prof.enable(a.profile or None)
+    workers=a.workers or None
+    out=a.out or os.path.join(root,'raw_output')
+    jobs=[]
+    if 'grid' in a.mode and not a.axis:
+        parser.error('grid mode needs at least one --axis')
+    for mode in a.mode:
+        n=a.n or (100000 if mode=='random' else 100)
+        ext='.'+(a.format or ('npy' if mode=='random' else 'csv'))
+        jobs+=sweep_jobs(mode,n,a.chunk,ext,out,a.parms,a.lamdis,a.seed,a.axis)
+    fnames=[fname for _,fname in jobs]
+    if len(set(fnames))<len(fnames):
+        parser.error('several sweeps would write the same file, give each mode once')
+    if a.dry_run:
+        est=estimate(jobs,workers)
+        for fname,m,size,t in est:
+            print('%-40s %12d rows %10.1f MB %10.2f s'%(os.path.relpath(fname),m,size/2**20,t))
+        print('%-40s %12d rows %10.1f MB %10.2f s'%('total',sum(x[1] for x in est),sum(x[2] for x in est)/2**20,sum(x[3] for x in est)))
+        return
+    os.makedirs(out,exist_ok=True)
+    t=time.time()
+    run_jobs(jobs,workers)
+    print('%d sweeps in %.2f s'%(len(jobs),time.time()-t),file=sys.stderr)
+
+if __name__=='__main__':
+    main()
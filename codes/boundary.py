@@ -0,0 +1,223 @@
+import numpy as np
+import pandas as pd
+from scipy.optimize import brentq
+from MM import from_unit, to_unit
+from sweep import solve_chunk, cols
+
+# p11 on each boundary as a function of p00. coor, semi and comp are the
+# category edges of categories.ptsin, indep (no eps) is the curve of exactly
+# independent genes, between the comp and semi edges
+curves={
+    'coor': lambda p00,eps: 1-p00-eps,
+    'indep': lambda p00,eps: np.square(1-np.sqrt(p00)),
+    'semi': lambda p00,eps: np.square(1-np.sqrt(p00)+eps),
+    'comp': lambda p00,eps: np.square(1-np.sqrt(p00)-eps),
+}
+idx={'p':0,'q':1,'r':2,'s':3,'l':4}
+fixed=(0.5,0.5,0.5,0.5,10) # Default fixed parameters, every parameter's sweep crosses some boundary
+
+def residual(y,curve:str='indep',eps:float=0.1):
+    """Signed distance in p11 of steady states from a category boundary
+
+    Parameters
+    ----------
+    y : NDArray (n,9)
+        - Solved parameter sets, as returned by solve_chunk
+    curve : str, optional
+        - Boundary
+            - coor / p11 = 1 - p00 - eps, edge of coor
+            - indep / p11 = (1 - sqrt(p00))^2, independent genes (default)
+            - semi / p11 = (1 - sqrt(p00) + eps)^2, edge of semi
+            - comp / p11 = (1 - sqrt(p00) - eps)^2, edge of comp
+    eps : float, optional
+        - Tolerance of the categories, by default 0.1
+
+    Returns
+    -------
+    f : NDArray (n,)
+        - p11 minus the boundary, positive above it, NaN for degenerate chains
+
+    Raises
+    ------
+    Boundary undefined
+    """
+    if curve not in curves:
+        raise Exception("Boundary undefined")
+    return y[:,8]-curves[curve](y[:,5],eps)
+
+def _brackets(r,ftol):
+    # Consecutive finite samples of opposite sign, ignoring residuals within ftol of 0
+    k=np.nonzero(np.isfinite(r)&(np.abs(r)>ftol))[0]
+    return [(a,b) for a,b in zip(k[:-1],k[1:]) if r[a]*r[b]<0]
+
+def _solve(U,lamdis):
+    # Solved sets for points of the unit cube
+    return solve_chunk(from_unit(np.atleast_2d(U),lamdis))
+
+def crossings(parm:str,curve:str='indep',R0=fixed,lamdis:str='loguni',eps:float=0.1,n:int=16,xtol:float=1e-15,ftol:float=1e-12):
+    """Points where a 1-D sweep crosses a category boundary, to machine precision
+
+    The swept axis is scanned at n+1 points to bracket sign changes, each is
+    then refined by Brent's method, a few dozen solves in all.
+
+    Parameters
+    ----------
+    parm : str
+        - Swept parameter, p / q / r / s / l, over the same range as parm_sweeper
+    curve : str, optional
+        - Boundary, see residual
+    R0 : NDArray (5,), optional
+        - Fixed parameters, by default fixed. With lambda 1 the genes are
+          independent and every point lies on indep, so no crossing is found
+    lamdis : str, optional
+        - Scale of lambda, see parm_sweeper
+    eps : float, optional
+        - Tolerance of the categories, by default 0.1
+    n : int, optional
+        - No. of intervals scanned for brackets, by default 16. Pairs of
+          crossings closer than 1/n may be missed
+    xtol : float, optional
+        - Absolute tolerance on the unit coordinate of the axis
+    ftol : float, optional
+        - Residuals within ftol of 0 are round-off and do not count as a sign
+          change
+
+    Returns
+    -------
+    df : DataFrame
+        - Rates and steady state (the raw output columns) at each crossing,
+          plus the curve and the unit coordinate u along the axis
+    """
+    U0=to_unit(np.asarray(R0,dtype=float)[None],lamdis)[0]
+    i=idx[parm]
+    def point(u):
+        U=np.tile(U0,(np.size(u),1))
+        U[:,i]=u
+        return U
+    f=lambda u: residual(_solve(point(u),lamdis),curve,eps)[0]
+    u=np.linspace(0,1,n+1)
+    r=residual(_solve(point(u),lamdis),curve,eps)
+    roots=np.array([brentq(f,u[a],u[b],xtol=xtol,rtol=4*np.finfo(float).eps) for a,b in _brackets(r,ftol)])
+    df=pd.DataFrame(_solve(point(roots),lamdis) if len(roots) else np.zeros((0,9)),columns=cols)
+    df['curve']=curve
+    df['u']=roots
+    return df
+
+def trace(parms,curve:str='indep',R0=fixed,lamdis:str='loguni',eps:float=0.1,h:float=0.01,n:int=16,max_points:int=2000,xtol:float=1e-15,ftol:float=1e-12):
+    """Boundary curve of a category in the plane of two parameters
+
+    Starts from the crossings on the edges of the unit square of the two
+    parameters and follows the curve inwards by predictor-corrector
+    continuation: a step of h along the tangent, then Brent's method along
+    the normal back onto the curve, halving h where that fails. Every
+    branch that enters the square through an edge is traced to where it
+    leaves, or comes within h/100 of an edge.
+
+    Parameters
+    ----------
+    parms : tuple of str
+        - The two swept parameters, each over the same range as parm_sweeper2D
+    curve : str, optional
+        - Boundary, see residual
+    R0 : NDArray (5,), optional
+        - Fixed parameters, see crossings
+    lamdis : str, optional
+        - Scale of lambda, see parm_sweeper2D
+    eps : float, optional
+        - Tolerance of the categories, by default 0.1
+    h : float, optional
+        - Step along the curve in unit coordinates, by default 0.01
+    n : int, optional
+        - No. of intervals scanned along each edge for starting points
+    max_points : int, optional
+        - Max no. of points per branch
+    xtol : float, optional
+        - Absolute tolerance of the corrector in unit coordinates
+    ftol : float, optional
+        - Round-off level of the residual on the edges, see crossings
+
+    Returns
+    -------
+    df : DataFrame
+        - Rates and steady state (the raw output columns) at each point,
+          plus the curve, the branch no. and the unit coordinates u, v of
+          the two parameters, in order along each branch
+    """
+    U0=to_unit(np.asarray(R0,dtype=float)[None],lamdis)[0]
+    i,j=idx[parms[0]],idx[parms[1]]
+    def point(xy):
+        xy=np.atleast_2d(xy)
+        U=np.tile(U0,(len(xy),1))
+        U[:,i],U[:,j]=xy[:,0],xy[:,1]
+        return U
+    F=lambda xy: residual(_solve(point(xy),lamdis),curve,eps)
+    inside=lambda xy: np.all((xy>=0)&(xy<=1))
+    # Starting points on the edges of the square
+    starts=[]
+    for axis in (0,1):
+        for side in (0.0,1.0):
+            u=np.linspace(0,1,n+1)
+            xy=np.stack([u,np.full_like(u,side)][::1 if axis==0 else -1],axis=1)
+            r=F(xy)
+            for a,b in _brackets(r,ftol):
+                g=lambda t: F(xy[a]+t*(xy[b]-xy[a]))[0]
+                starts.append(xy[a]+brentq(g,0,1,xtol=xtol)*(xy[b]-xy[a]))
+    branches=[]
+    done=np.zeros(len(starts),dtype=bool)
+    d=1e-7 # Step for the gradient
+    for s,P in enumerate(starts):
+        if done[s]:
+            continue
+        done[s]=True
+        pts=[P]
+        t_prev=np.array([0.5,0.5])-P # First step into the square
+        step=h
+        while len(pts)<max_points and step>1e-6:
+            P=pts[-1]
+            r=F(np.array([P+[d,0],P-[d,0],P+[0,d],P-[0,d]]))
+            g=np.array([r[0]-r[1],r[2]-r[3]])/(2*d)
+            if not np.all(np.isfinite(g)) or not g.any():
+                break
+            nrm=g/np.linalg.norm(g)
+            t=np.array([-nrm[1],nrm[0]])
+            if t@t_prev<0:
+                t=-t
+            Q=P+step*t
+            # Correct along the normal within [-step, step]
+            a=np.linspace(-step,step,5)
+            r=F(Q+a[:,None]*nrm)
+            k=np.nonzero(r[:-1]*r[1:]<=0)[0]
+            if not len(k):
+                step/=2
+                continue
+            k=k[np.argmin(np.abs(a[k]))]
+            try:
+                c=brentq(lambda x: F(Q+x*nrm)[0],a[k],a[k+1],xtol=xtol) if r[k]!=0 else a[k]
+            except ValueError:
+                # Degenerate chain inside the bracket, e.g. past the edge of the square
+                step/=2
+                continue
+            Q=Q+c*nrm
+            if not inside(Q) or np.min(np.minimum(Q,1-Q))<h/100:
+                # Left the square or came within h/100 of an edge, where curves hugging a degenerate
+                # edge would be crawled in tiny steps, end on the edge crossing it approaches
+                ends=[e for e,E in enumerate(starts) if not done[e] and np.linalg.norm(E-P)<=2*step]
+                if ends:
+                    e=min(ends,key=lambda e: np.linalg.norm(starts[e]-P))
+                    done[e]=True
+                    pts.append(starts[e])
+                elif inside(Q):
+                    pts.append(Q)
+                break
+            pts.append(Q)
+            t_prev=t
+            step=min(2*step,h)
+        branches.append(np.array(pts))
+    rows=[]
+    for b,pts in enumerate(branches):
+        df=pd.DataFrame(_solve(point(pts),lamdis),columns=cols)
+        df['curve']=curve
+        df['branch']=b
+        df['u'],df['v']=pts[:,0],pts[:,1]
+        rows.append(df)
+    return pd.concat(rows,ignore_index=True) if rows else pd.DataFrame(columns=cols+['curve','branch','u','v'])
@@ -0,0 +1,73 @@
+import numpy as np
+
+cats=['p2ex','p0ex','comp','coor','semi','indep'] # Categories in priority order
+
+def ptsin(p00,p11,cat:str,eps:float=0.1):
+    """Whether steady states fall in a category
+
+    Parameters
+    ----------
+    p00 : NDArray or Series (n,)
+        - Probability of both genes off
+    p11 : NDArray or Series (n,)
+        - Probability of both genes on
+    cat : str
+        - Category
+            - p0ex / both genes mostly off, p00 >= 1 - 2 eps
+            - p2ex / both genes mostly on, p11 >= 1 - 2 eps
+            - comp / competitive, p11 < (1 - sqrt(p00) - eps)^2
+            - coor / coordinated, p11 >= 1 - p00 - eps
+            - semi / semi-coordinated, p11 > (1 - sqrt(p00) + eps)^2
+            - indep / independent, p11 <= (1 - sqrt(p00) + eps)^2
+    eps : float, optional
+        - Tolerance around the category boundaries, by default 0.1
+
+    Returns
+    -------
+    inside : NDArray or Series (n,) of bool
+        - Same type as p00
+
+    Raises
+    ------
+    Category undefined
+    """
+    if cat=='p0ex':
+        return p00>=1-2*eps
+    elif cat=='p2ex':
+        return p11>=1-2*eps
+    elif cat=='comp':
+        return p11<np.square(1-np.sqrt(p00)-eps)
+    elif cat=='coor':
+        return p11>=1-p00-eps
+    elif cat=='semi':
+        return p11>np.square(1-np.sqrt(p00)+eps)
+    elif cat=='indep':
+        return p11<=np.square(1-np.sqrt(p00)+eps)
+    else:
+        raise Exception("Category undefined")
+
+def categorize(p00,p11,cats=cats,eps:float=0.1):
+    """Category of every steady state in one pass
+
+    Parameters
+    ----------
+    p00 : NDArray (n,)
+        - Probability of both genes off
+    p11 : NDArray (n,)
+        - Probability of both genes on
+    cats : list of str, optional
+        - Categories, a point gets the first one it satisfies, see ptsin
+    eps : float, optional
+        - Tolerance around the category boundaries, by default 0.1
+
+    Returns
+    -------
+    c : NDArray (n,) of int
+        - Index into cats, -1 if no category applies
+
+    Raises
+    ------
+    Category undefined
+    """
+    p00,p11=np.asarray(p00,dtype=float),np.asarray(p11,dtype=float)
+    return np.select([ptsin(p00,p11,cat,eps) for cat in cats],np.arange(len(cats)),-1)
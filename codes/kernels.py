@@ -0,0 +1,106 @@
+import numpy as np
+from numba import njit, prange
+
+# Numba compiled versions of the MM.py batch kernels, picked by MM when numba
+# is installed (see MM.backend). Each loops over parameter sets or chains in
+# parallel and computes one 4x4 problem in registers, so no (n,4,4)
+# temporaries are made. Results match the NumPy path to round-off, simulate
+# bit for bit. Compiled code is cached in __pycache__ after the first call,
+# the no. of threads is set by NUMBA_NUM_THREADS.
+
+@njit(parallel=True,cache=True,error_model='numpy')
+def t_batch(R):
+    """Transition matrices of a batch of rate parameters, see MM.T_batch"""
+    n=R.shape[0]
+    TM=np.empty((n,4,4))
+    for k in prange(n):
+        p,q,r,s,l=R[k,0],R[k,1],R[k,2],R[k,3],R[k,4]
+        lq=l*q
+        M=TM[k]
+        M[0,0]=p*p
+        M[0,1]=p*r
+        M[0,2]=p*r
+        M[0,3]=r*r
+        M[1,0]=p*s
+        M[1,1]=p*q
+        M[1,2]=r*s
+        M[1,3]=lq*r
+        M[2,0]=p*s
+        M[2,1]=r*s
+        M[2,2]=p*q
+        M[2,3]=lq*r
+        M[3,0]=s*s
+        M[3,1]=lq*s
+        M[3,2]=lq*s
+        M[3,3]=lq*lq
+        # Normalize each column to 1
+        for j in range(4):
+            c=M[0,j]+M[1,j]+M[2,j]+M[3,j]
+            for i in range(4):
+                M[i,j]/=c
+    return TM
+
+@njit(inline='always')
+def _m(T,i,j):
+    # Entry of I - TM, the diagonal from the off-diagonal column sum
+    if i!=j:
+        return -T[i,j]
+    return T[0,j]+T[1,j]+T[2,j]+T[3,j]-T[j,j]
+
+@njit(inline='always')
+def _minor(T,a,b,c):
+    # Principal minor of I - TM on rows and columns a, b, c
+    return (_m(T,a,a)*(_m(T,b,b)*_m(T,c,c)-_m(T,b,c)*_m(T,c,b))
+        -_m(T,a,b)*(_m(T,b,a)*_m(T,c,c)-_m(T,b,c)*_m(T,c,a))
+        +_m(T,a,c)*(_m(T,b,a)*_m(T,c,b)-_m(T,b,b)*_m(T,c,a)))
+
+@njit(parallel=True,cache=True,error_model='numpy')
+def steady_state(TM,tol):
+    """Steady states of a batch of transition matrices by the cofactor formula, see MM.steady_state"""
+    n=TM.shape[0]
+    ev=np.empty((n,4))
+    ok=np.empty(n,dtype=np.bool_)
+    for k in prange(n):
+        T=TM[k]
+        e=ev[k]
+        e[0]=_minor(T,1,2,3)
+        e[1]=_minor(T,0,2,3)
+        e[2]=_minor(T,0,1,3)
+        e[3]=_minor(T,0,1,2)
+        tot=e[0]+e[1]+e[2]+e[3]
+        for i in range(4):
+            e[i]/=tot
+        # Residual |TM @ ev - ev| below tol in every state, NaN fails
+        ok[k]=True
+        for i in range(4):
+            d=abs(T[i,0]*e[0]+T[i,1]*e[1]+T[i,2]*e[2]+T[i,3]*e[3]-e[i])
+            if not d<tol:
+                ok[k]=False
+        if not ok[k]:
+            e[:]=np.nan
+    return ev,ok
+
+@njit(parallel=True,cache=True,error_model='numpy')
+def chain_steps(C,s,U,S):
+    """Advances chains through the uniform draws U, writing the states to S
+
+    Parameters
+    ----------
+    C : NDArray (n, 4, 4)
+        - Cumulative distribution of the next state (rows) for each current
+          state (columns) of each chain, may be a broadcast view
+    s : NDArray (n,) of uint8
+        - Current states, updated in place
+    U : NDArray (n, m)
+        - Uniform draws, one per chain and step
+    S : NDArray (n, m) of int8
+        - States after each step
+    """
+    n,m=U.shape
+    for c in prange(n):
+        x=np.int64(s[c])
+        for t in range(m):
+            u=U[c,t]
+            x=(u>C[c,0,x])+(u>C[c,1,x])+(u>C[c,2,x])
+            S[c,t]=x
+        s[c]=x
@@ -0,0 +1,180 @@
+import os
+import sys
+import time
+import atexit
+
+# Profiling is off unless ARME_PROFILE is set (or enable is called):
+#   ARME_PROFILE=1                 per stage timers, counters and progress
+#   ARME_PROFILE=out.prof          as above, plus a cProfile dump to out.prof
+#   ARME_PROFILE=out.html          as above, plus a pyinstrument report (needs pyinstrument)
+enabled=False
+timers={} # Stage name -> [seconds, calls, points]
+interval=1.0 # Seconds between progress reports
+
+_t0=None
+_last=0.0
+_start=None
+_profiler=None
+_out=None
+
+class _Null:
+    # Stand-in returned by stage when profiling is off
+    def __enter__(self):
+        return self
+
+    def __exit__(self,*args):
+        pass
+
+    def add(self,n):
+        pass
+
+_null=_Null()
+
+class _Stage:
+    def __init__(self,name,n):
+        self.name=name
+        self.n=n
+
+    def __enter__(self):
+        self.t=time.perf_counter()
+        return self
+
+    def __exit__(self,*args):
+        t=timers.setdefault(self.name,[0.0,0,0])
+        t[0]+=time.perf_counter()-self.t
+        t[1]+=1
+        t[2]+=self.n
+
+    def add(self,n):
+        self.n+=n
+
+def stage(name:str,n:int=0):
+    """Times a block of code under a stage name
+
+    Used as a context manager, e.g. with stage('steady_state',len(R)): ...
+    When profiling is off a shared no-op is returned.
+
+    Parameters
+    ----------
+    name : str
+        - Stage name in the report
+    n : int, optional
+        - No. of points processed, more can be added with .add(n)
+    """
+    return _Stage(name,n) if enabled else _null
+
+def timed(it,name:str):
+    """Times the production of each item of an iterable, e.g. a lazy generator
+
+    Parameters
+    ----------
+    it : iterable of sized items
+        - Items are counted as len(item) points
+    name : str
+        - Stage name in the report
+
+    Returns
+    -------
+    it : iterable
+        - The same items, it unchanged when profiling is off
+    """
+    return _timed(it,name) if enabled else it
+
+def _timed(it,name):
+    it=iter(it)
+    while True:
+        with stage(name) as st:
+            try:
+                x=next(it)
+            except StopIteration:
+                return
+            st.add(len(x))
+        yield x
+
+def progress(i:int,n:int=None,unit:str='points'):
+    """Reports the no. of points done and the rate, at most every interval seconds
+
+    Call with i=0 when a run starts, the rate is measured from there.
+
+    Parameters
+    ----------
+    i : int
+        - Points done so far
+    n : int, optional
+        - Total no. of points, if known
+    unit : str, optional
+        - Name of the points
+    """
+    global _last,_start
+    if not enabled:
+        return
+    now=time.perf_counter()
+    if i==0 or _start is None:
+        _start=_last=now
+        return
+    if now-_last<interval and (n is None or i<n):
+        return
+    _last=now
+    dt=now-_start
+    msg='%d/%d'%(i,n) if n else '%d'%i
+    print('[prof] %s %s, %.3g %s/s'%(msg,unit,i/dt if dt else 0,unit),file=sys.stderr)
+
+def report(file=sys.stderr):
+    """Prints the time, calls and points per second of every stage"""
+    if not timers:
+        return
+    wall=time.perf_counter()-_t0
+    print('[prof] %-16s %10s %6s %8s %12s %12s'%('stage','time (s)','%','calls','points','points/s'),file=file)
+    for name,(t,calls,n) in sorted(timers.items(),key=lambda x: -x[1][0]):
+        print('[prof] %-16s %10.4f %6.1f %8d %12d %12.4g'%(name,t,100*t/wall,calls,n,n/t if t and n else 0),file=file)
+    print('[prof] %-16s %10.4f'%('wall',wall),file=file)
+
+def _finish():
+    report()
+    if _profiler is None:
+        return
+    if _out.endswith('.html'):
+        _profiler.stop()
+        with open(_out,'w') as f:
+            f.write(_profiler.output_html())
+    else:
+        _profiler.disable()
+        _profiler.dump_stats(_out)
+    print('[prof] profile written to',_out,file=sys.stderr)
+
+def enable(out:str=None):
+    """Turns profiling on for the rest of the process, the report is printed at exit
+
+    Parameters
+    ----------
+    out : str, optional
+        - Also profile every call, dumped to this file at exit. .html gives a
+          pyinstrument report, anything else a cProfile dump (pstats, snakeviz)
+
+    Raises
+    ------
+    pyinstrument not installed
+    """
+    global enabled,_t0,_profiler,_out
+    if enabled:
+        return
+    if out:
+        if out.endswith('.html'):
+            try:
+                from pyinstrument import Profiler
+            except ImportError:
+                raise Exception("pyinstrument not installed")
+            _profiler=Profiler()
+            _profiler.start()
+        else:
+            import cProfile
+            _profiler=cProfile.Profile()
+            _profiler.enable()
+        _out=out
+    enabled=True
+    _t0=time.perf_counter()
+    atexit.register(_finish)
+
+if os.environ.get('ARME_PROFILE','') not in ('','0'):
+    flag=os.environ['ARME_PROFILE']
+    enable(None if flag=='1' else flag)
@@ -0,0 +1,130 @@
+import warnings
+import numpy as np
+import pandas as pd
+from scipy.stats import qmc
+from MM import from_unit
+from sweep import solve_chunk
+from categories import categorize, cats
+
+parms=['p','q','r','s','l']
+states=['p00','p01','p10','p11']
+
+def saltelli(m:int,lamdis:str='loguni',seed=None):
+    """Saltelli design from a scrambled Sobol sequence over the randomer parameter space
+
+    Parameters
+    ----------
+    m : int
+        - Base sample of n = 2^m points, the design has n (d + 2) points
+    lamdis : str, optional
+        - Sample distribution for lambda, see randomer
+    seed : int or Generator, optional
+        - Seed of the scrambling
+
+    Returns
+    -------
+    A, B : NDArray (n,5)
+        - Two independent base samples of rate parameters
+    AB : NDArray (5,n,5)
+        - AB[i] is A with column i taken from B
+    """
+    X=qmc.Sobol(d=10,scramble=True,seed=seed).random_base2(m)
+    A,B=X[:,:5],X[:,5:]
+    AB=np.repeat(A[None],5,axis=0)
+    for i in range(5):
+        AB[i,:,i]=B[:,i]
+    return from_unit(A,lamdis),from_unit(B,lamdis),from_unit(AB.reshape(-1,5),lamdis).reshape(5,-1,5)
+
+def outputs(R,cats=cats,eps:float=0.1):
+    """Model outputs of parameter sets: steady state probabilities and category indicators
+
+    Parameters
+    ----------
+    R : NDArray (n,5)
+        - Rate and Interaction Parameters
+    cats : list of str, optional
+        - Categories in priority order, see categories.categorize
+    eps : float, optional
+        - Tolerance of the categories, by default 0.1
+
+    Returns
+    -------
+    Y : DataFrame (n, 4 + len(cats))
+        - p00, p01, p10, p11 and a 0/1 column per category
+    """
+    y=solve_chunk(R)
+    Y=pd.DataFrame(y[:,5:],columns=states)
+    c=categorize(y[:,5],y[:,8],cats,eps)
+    for k,cat in enumerate(cats):
+        Y[cat]=np.where(np.isfinite(y[:,5]),c==k,np.nan)
+    return Y
+
+def _indices(fA,fB,fAB):
+    # First order (Saltelli 2010) and total (Jansen) indices of each parameter, rows of fAB per parameter
+    V=np.var(np.concatenate((fA,fB),axis=-1),axis=-1)
+    V=np.broadcast_to(V,fAB.shape[:-1])
+    # Outputs constant over the sample have no indices
+    S1=np.full(V.shape,np.nan)
+    ST=np.full(V.shape,np.nan)
+    var=V>0
+    S1[var]=np.mean(fB*(fAB-fA),axis=-1)[var]/V[var]
+    ST[var]=0.5*np.mean(np.square(fA-fAB),axis=-1)[var]/V[var]
+    return S1,ST
+
+def sobol_indices(m:int=12,lamdis:str='loguni',cats=cats,eps:float=0.1,n_boot:int=200,conf:float=0.95,seed=None):
+    """First order and total Sobol indices of every output with bootstrap confidence intervals
+
+    Evaluates a Saltelli design of 2^m (d + 2) parameter sets, d = 5, in one
+    vectorized pass. The quasi-random design converges much faster than a
+    pseudo-random sample of the same size.
+
+    Parameters
+    ----------
+    m : int, optional
+        - Base sample of 2^m points, by default 12
+    lamdis : str, optional
+        - Sample distribution for lambda, see randomer
+    cats : list of str, optional
+        - Categories in priority order, see categories.categorize
+    eps : float, optional
+        - Tolerance of the categories, by default 0.1
+    n_boot : int, optional
+        - No. of bootstrap resamples of the base sample, by default 200
+    conf : float, optional
+        - Confidence level of the intervals, by default 0.95
+    seed : int, optional
+        - Seed of the design and the bootstrap
+
+    Returns
+    -------
+    df : DataFrame
+        - One row per output and parameter with S1 and ST and the bounds
+          S1_lo, S1_hi, ST_lo, ST_hi of their confidence intervals. Outputs
+          are p00, p01, p10, p11 and the indicator of each category
+    """
+    rng=np.random.default_rng(seed)
+    A,B,AB=saltelli(m,lamdis,rng)
+    n=len(A)
+    Y=outputs(np.concatenate((A,B,AB.reshape(-1,5))),cats,eps)
+    names=list(Y.columns)
+    Y=Y.to_numpy().T.reshape(len(names),7,n) # Output, (A, B, AB_1..AB_5), sample
+    # Drop base points where any evaluation is degenerate
+    ok=np.isfinite(Y).all(axis=(0,1))
+    Y=Y[:,:,ok]
+    fA,fB,fAB=Y[:,None,0],Y[:,None,1],Y[:,2:]
+    S1,ST=_indices(fA,fB,fAB)
+    # Bootstrap over the base sample
+    idx=rng.integers(Y.shape[2],size=(n_boot,Y.shape[2]))
+    bS1=np.empty((n_boot,)+S1.shape)
+    bST=np.empty((n_boot,)+ST.shape)
+    for b in range(n_boot):
+        bS1[b],bST[b]=_indices(fA[...,idx[b]],fB[...,idx[b]],fAB[...,idx[b]])
+    q=[(1-conf)/2,(1+conf)/2]
+    with warnings.catch_warnings():
+        # Outputs constant over the sample have no indices
+        warnings.simplefilter('ignore',RuntimeWarning)
+        S1_lo,S1_hi=np.nanquantile(bS1,q,axis=0)
+        ST_lo,ST_hi=np.nanquantile(bST,q,axis=0)
+    index=pd.MultiIndex.from_product([names,parms],names=['output','parm'])
+    return pd.DataFrame({'S1':S1.ravel(),'S1_lo':S1_lo.ravel(),'S1_hi':S1_hi.ravel(),
+        'ST':ST.ravel(),'ST_lo':ST_lo.ravel(),'ST_hi':ST_hi.ravel()},index=index)
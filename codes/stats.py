@@ -0,0 +1,230 @@
+import numpy as np
+from MM import steady_state
+
+genes=np.array([[0,1,0,1],[0,0,1,1]]) # On/off of gene 1 (State%2) and gene 2 (State//2) in each state
+
+def _stack(TM):
+    # Batch of matrices and whether a single one was given
+    TM=np.asarray(TM,dtype=float)
+    return TM.reshape(-1,4,4),TM.ndim==2
+
+def matrix_power(TM,t):
+    """Powers of a batch of transition matrices by repeated squaring
+
+    Parameters
+    ----------
+    TM : NDArray (n, 4, 4)
+        - Stack of transition matrices
+    t : int or NDArray (n,) of int
+        - Exponent, common or one per matrix
+
+    Returns
+    -------
+    P : NDArray (n, 4, 4)
+        - TM^t for each matrix
+
+    Raises
+    ------
+    N/A
+    """
+    TM=np.asarray(TM,dtype=float)
+    t=np.broadcast_to(np.asarray(t,dtype=np.int64),TM.shape[:-2])
+    P=np.broadcast_to(np.eye(4),TM.shape).copy()
+    sq=TM.copy()
+    k=0
+    while (t>>k).any():
+        bit=((t>>k)&1).astype(bool)
+        P[bit]=P[bit]@sq[bit]
+        k+=1
+        sq=sq@sq
+    return P
+
+def nstep(TM,t:int,p0=None):
+    """Distribution of the chain after t steps
+
+    Parameters
+    ----------
+    TM : NDArray (4, 4) or (n, 4, 4)
+        - Transition matrices
+    t : int or NDArray (n,) of int
+        - No. of steps
+    p0 : NDArray (4,) or (n, 4), optional
+        - Initial distribution, by default the identity so that column j
+          is the distribution after starting in state j
+
+    Returns
+    -------
+    p : NDArray (n, 4) or (n, 4, 4)
+        - TM^t @ p0, or TM^t without p0
+
+    Raises
+    ------
+    N/A
+    """
+    TM,single=_stack(TM)
+    P=matrix_power(TM,t)
+    if p0 is not None:
+        P=np.einsum('nij,nj->ni',P,np.broadcast_to(p0,(len(P),4)))
+    return P[0] if single else P
+
+def fundamental(TM):
+    """Fundamental matrix Z = (I - TM + pi 1^T)^-1 of each chain
+
+    Parameters
+    ----------
+    TM : NDArray (4, 4) or (n, 4, 4)
+        - Transition matrices
+
+    Returns
+    -------
+    Z : NDArray (n, 4, 4)
+        - Fundamental matrices, NaN for chains without a unique steady state
+    ev : NDArray (n, 4)
+        - Steady state probabilities
+
+    Raises
+    ------
+    N/A
+    """
+    TM,single=_stack(TM)
+    ev,ok=steady_state(TM)
+    A=np.eye(4)-TM+ev[:,:,None]
+    A[~ok]=np.eye(4) # Keep singular rows out of the solve
+    Z=np.linalg.inv(A)
+    Z[~ok]=np.nan
+    return (Z[0],ev[0]) if single else (Z,ev)
+
+def first_passage(TM):
+    """Mean first passage times between states
+
+    Parameters
+    ----------
+    TM : NDArray (4, 4) or (n, 4, 4)
+        - Transition matrices
+
+    Returns
+    -------
+    M : NDArray (n, 4, 4)
+        - M[..., i, j] is the mean no. of steps to first reach state i from
+          state j, same orientation as TM. The diagonal is the mean return time
+          1/pi_i
+
+    Raises
+    ------
+    N/A
+    """
+    TM,single=_stack(TM)
+    Z,ev=fundamental(TM)
+    d=np.arange(4)
+    with np.errstate(invalid='ignore',divide='ignore'):
+        M=(Z[:,d,d][:,:,None]-Z)/ev[:,:,None]
+        M[:,d,d]=1/ev
+    return M[0] if single else M
+
+def spectral_gap(TM):
+    """Spectral gap 1 - |lambda_2| and relaxation time of each chain
+
+    Parameters
+    ----------
+    TM : NDArray (4, 4) or (n, 4, 4)
+        - Transition matrices
+
+    Returns
+    -------
+    gap : NDArray (n,)
+        - One minus the second largest eigenvalue modulus, NaN for matrices with non-finite entries
+    trel : NDArray (n,)
+        - Relaxation time 1/gap, inf for matrices with non-finite entries
+
+    Raises
+    ------
+    N/A
+    """
+    TM,single=_stack(TM)
+    # eigvals raises on any NaN / inf, so only finite matrices are solved
+    ok=np.isfinite(TM).all(axis=(1,2))
+    gap=np.full(len(TM),np.nan)
+    gap[ok]=1-np.sort(np.abs(np.linalg.eigvals(TM[ok])),axis=1)[:,-2]
+    with np.errstate(divide='ignore'):
+        trel=np.where(ok,1/gap,np.inf)
+    return (gap[0],trel[0]) if single else (gap,trel)
+
+def _tv(P,ev):
+    # Worst case total variation distance from the steady state over initial states
+    return 0.5*np.abs(P-ev[:,:,None]).sum(axis=1).max(axis=1)
+
+def mixing_time(TM,eps:float=0.25,kmax:int=40):
+    """Mixing time, the first t with TM^t within eps of the steady state
+
+    The distance is the total variation from the worst initial state, which
+    never increases with t, so t is found by binary lifting on TM^(2^k).
+
+    Parameters
+    ----------
+    TM : NDArray (4, 4) or (n, 4, 4)
+        - Transition matrices
+    eps : float, optional
+        - Total variation threshold, by default 0.25
+    kmax : int, optional
+        - Largest power of two searched, by default 40
+
+    Returns
+    -------
+    tmix : NDArray (n,)
+        - Mixing time, inf where it exceeds 2^kmax or the steady state is not unique
+
+    Raises
+    ------
+    N/A
+    """
+    TM,single=_stack(TM)
+    ev,ok=steady_state(TM)
+    # Powers TM^(2^k)
+    sq=[TM]
+    for k in range(kmax):
+        sq.append(sq[-1]@sq[-1])
+    mixed=ok & (_tv(sq[-1],ev)<=eps)
+    # Largest t with distance above eps, built bit by bit
+    P=np.broadcast_to(np.eye(4),TM.shape).copy()
+    t=np.zeros(len(TM))
+    for k in range(kmax,-1,-1):
+        Q=P@sq[k]
+        far=_tv(Q,ev)>eps
+        P[far]=Q[far]
+        t[far]+=2**k
+    tmix=np.where(mixed,t+1,np.inf)
+    tmix[mixed & (_tv(np.broadcast_to(np.eye(4),TM.shape),ev)<=eps)]=0
+    return tmix[0] if single else tmix
+
+def autocorr(TM,lags,gene:int=0):
+    """Autocorrelation of a gene's on/off signal in the steady state
+
+    Parameters
+    ----------
+    TM : NDArray (4, 4) or (n, 4, 4)
+        - Transition matrices
+    lags : int or NDArray (L,) of int
+        - Lags in steps
+    gene : int, optional
+        - Gene 0 (State%2) or gene 1 (State//2), by default 0
+
+    Returns
+    -------
+    rho : NDArray (n, L)
+        - Autocorrelation at each lag, NaN for a gene that never switches
+
+    Raises
+    ------
+    N/A
+    """
+    TM,single=_stack(TM)
+    lags=np.atleast_1d(lags)
+    ev,ok=steady_state(TM)
+    g=genes[gene]
+    mu=ev@g
+    # E[g(X_0) g(X_k)] = sum_ij g_i TM^k_ij g_j pi_j
+    P=matrix_power(np.repeat(TM[:,None],len(lags),axis=1),np.broadcast_to(lags,(len(TM),len(lags))))
+    E=np.einsum('i,nlij,j,nj->nl',g,P,g,ev)
+    with np.errstate(invalid='ignore',divide='ignore'):
+        rho=(E-mu[:,None]**2)/(mu*(1-mu))[:,None]
+    return rho[0] if single else rho
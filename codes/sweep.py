@@ -0,0 +1,202 @@
+import os
+from itertools import islice
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from MM import T_batch, steady_state, randomer, chunk_seeds
+from prof import stage, timed, progress
+
+cols=['p','q','r','s','l','p00','p01','p10','p11'] # Columns of the raw output
+
+def solve_chunk(R):
+    """Computes the steady state probabilities for a chunk of parameter sets
+
+    Parameters
+    ----------
+    R : NDArray (n,5)
+        - Rate and Interaction Parameters
+
+    Returns
+    -------
+    y : NDArray (n,9)
+        - Rates and respective steady state probabilities column wise
+
+    Raises
+    ------
+    N/A
+    """
+    with stage('T',len(R)):
+        TM=T_batch(R)
+    with stage('steady_state',len(R)):
+        ev,ok=steady_state(TM)
+    return np.concatenate((R,ev),axis=1)
+
+def run_sweep(chunks,fname:str,n:int=None):
+    """Solves a stream of parameter chunks and writes the results as they come
+
+    Parameters
+    ----------
+    chunks : iterable of NDArray (m,5)
+        - Parameter sets, e.g. from randomer_chunks or chunker
+    fname : str
+        - Output file, see write_sweep
+    n : int, optional
+        - Total no. of parameter sets, required for .npy
+
+    Returns
+    -------
+    i : int
+        - No. of rows written
+
+    Raises
+    ------
+    Output format undefined
+    """
+    return write_sweep((solve_chunk(R) for R in timed(chunks,'generate')),fname,n)
+
+def write_sweep(results,fname:str,n:int=None):
+    """Writes a stream of solved chunks as they come
+
+    Only one chunk is held in memory at a time, the output format is picked
+    from the file extension.
+
+    Parameters
+    ----------
+    results : iterable of NDArray (m,9)
+        - Solved chunks, as returned by solve_chunk
+    fname : str
+        - Output file
+            - .csv / appended chunk by chunk
+            - .npy / memory-mapped (n,9) array, needs n
+            - .parquet / one row group per chunk, needs pyarrow
+            - .feather / one record batch per chunk, needs pyarrow
+    n : int, optional
+        - Total no. of parameter sets, required for .npy
+
+    Returns
+    -------
+    i : int
+        - No. of rows written
+
+    Raises
+    ------
+    Output format undefined
+    """
+    ext=os.path.splitext(fname)[1]
+    i=0
+    progress(i,n)
+    if ext=='.csv':
+        import pandas as pd
+        with open(fname,'w') as f:
+            for y in results:
+                with stage('write',len(y)):
+                    pd.DataFrame(y,columns=cols).to_csv(f,header=(i==0),index=False)
+                i+=len(y)
+                progress(i,n)
+    elif ext=='.npy':
+        if n is None:
+            raise Exception("No. of parameter sets needed for .npy output")
+        out=np.lib.format.open_memmap(fname,mode='w+',dtype=float,shape=(n,len(cols)))
+        for y in results:
+            with stage('write',len(y)):
+                out[i:i+len(y)]=y
+            i+=len(y)
+            progress(i,n)
+        out.flush()
+        del out
+    elif ext in ('.parquet','.feather'):
+        import pyarrow as pa
+        schema=pa.schema([(c,pa.float64()) for c in cols])
+        if ext=='.parquet':
+            import pyarrow.parquet as pq
+            writer=pq.ParquetWriter(fname,schema)
+        else:
+            writer=pa.ipc.new_file(fname,schema)
+        with writer:
+            for y in results:
+                with stage('write',len(y)):
+                    writer.write_batch(pa.RecordBatch.from_arrays(list(y.T),schema=schema))
+                i+=len(y)
+                progress(i,n)
+    else:
+        raise Exception("Output format undefined")
+    return i
+
+def random_tasks(n:int,lamdis:str,chunk:int=100000,seed=None):
+    """Split a random sweep into independent tasks for run_parallel
+
+    Each task draws its own chunk from its own seed, so the output is the same
+    as randomer_chunks with the same seed, whatever the no. of workers.
+
+    Parameters
+    ----------
+    n : int
+        - Total no. of sets to generate
+    lamdis : str
+        - Sample distribution for lambda, see randomer
+    chunk : int, optional
+        - Max no. of sets per task, by default 100000
+    seed : int or SeedSequence, optional
+        - Root seed, see chunk_seeds
+
+    Returns
+    -------
+    tasks : list of (int, str, SeedSequence)
+        - Arguments to randomer for each chunk
+    """
+    return [(m,lamdis,ss) for m,ss in chunk_seeds(n,chunk,seed)]
+
+def _solve_task(task):
+    # Tuples are randomer arguments, callables (GridChunk) build their chunk, anything else is a parameter chunk
+    if isinstance(task,tuple):
+        with stage('generate',task[0]):
+            task=randomer(*task)
+    elif callable(task):
+        with stage('generate',len(task)):
+            task=task()
+    return solve_chunk(task)
+
+def _imap(ex,fn,tasks,window:int):
+    # Ordered map over an executor with at most window tasks in flight
+    tasks=iter(tasks)
+    futures=[ex.submit(fn,t) for t in islice(tasks,window)]
+    while futures:
+        y=futures.pop(0).result()
+        futures.extend(ex.submit(fn,t) for t in islice(tasks,1))
+        yield y
+
+def run_parallel(jobs,workers:int=None,window:int=None):
+    """Runs several sweeps on a process pool, chunks spread across the workers
+
+    Results are written in task order, so the output files do not depend on
+    the no. of workers or the order the tasks finish in.
+
+    Parameters
+    ----------
+    jobs : list of (list, str)
+        - Tasks and output file of each sweep. A task is a parameter chunk
+          (NDArray (m,5)), randomer arguments from random_tasks or a
+          GridChunk from GridSweep.tasks
+    workers : int, optional
+        - No. of worker processes, all cores by default
+    window : int, optional
+        - Max no. of tasks in flight, by default 2 per worker
+
+    Returns
+    -------
+    n : list of int
+        - No. of rows written for each sweep
+
+    Raises
+    ------
+    N/A
+    """
+    workers=workers or os.cpu_count()
+    window=window or 2*workers
+    n=[]
+    with ProcessPoolExecutor(workers) as ex:
+        results=_imap(ex,_solve_task,(t for tasks,fname in jobs for t in tasks),window)
+        results=timed(results,'wait (workers)') # Solving happens in the workers
+        for tasks,fname in jobs:
+            m=sum(len(t) if not isinstance(t,tuple) else t[0] for t in tasks)
+            n.append(write_sweep(islice(results,len(tasks)),fname,m))
+    return n
@@ -0,0 +1,186 @@
+import numpy as np
+
+magic=b'ARMETRJ1' # File signature, followed by the no. of steps as uint64
+header=16 # Bytes before the packed states
+
+def pack(S):
+    """Packs states 0-3 four to a byte, state k in bits 2(k%4) and 2(k%4)+1
+
+    Parameters
+    ----------
+    S : NDArray (n,)
+        - States
+
+    Returns
+    -------
+    b : NDArray (ceil(n/4),) of uint8
+        - Packed states, padded with state 0
+    """
+    S=np.asarray(S,dtype=np.uint8)
+    P=np.zeros(-(-len(S)//4)*4,dtype=np.uint8)
+    P[:len(S)]=S
+    P=P.reshape(-1,4)
+    return P[:,0]|(P[:,1]<<2)|(P[:,2]<<4)|(P[:,3]<<6)
+
+def unpack(b):
+    """Unpacks bytes from pack into four states each
+
+    Parameters
+    ----------
+    b : NDArray (m,) of uint8
+        - Packed states
+
+    Returns
+    -------
+    S : NDArray (4m,) of int8
+        - States
+    """
+    b=np.asarray(b,dtype=np.uint8)
+    return ((b[:,None]>>np.array([0,2,4,6],dtype=np.uint8))&3).astype(np.int8).reshape(-1)
+
+class TrajWriter:
+    """Streams states to a bit-packed trajectory file
+
+    States can be written in pieces of any length, the header is completed
+    on close.
+
+    Parameters
+    ----------
+    fname : str
+        - Output file, .traj by convention
+    """
+    def __init__(self,fname:str):
+        self.f=open(fname,'wb')
+        self.f.write(magic+np.uint64(0).tobytes())
+        self.n=0
+        self.carry=np.zeros(0,dtype=np.uint8)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self,*args):
+        self.close()
+
+    def write(self,S):
+        S=np.concatenate((self.carry,np.asarray(S,dtype=np.uint8)))
+        k=len(S)//4*4
+        self.f.write(pack(S[:k]).tobytes())
+        self.n+=k
+        self.carry=S[k:]
+
+    def close(self):
+        if len(self.carry):
+            self.f.write(pack(self.carry).tobytes())
+            self.n+=len(self.carry)
+            self.carry=self.carry[:0]
+        self.f.seek(len(magic))
+        self.f.write(np.uint64(self.n).tobytes())
+        self.f.close()
+
+def write_traj(fname:str,S):
+    """Writes states to a bit-packed trajectory file
+
+    Parameters
+    ----------
+    fname : str
+        - Output file, .traj by convention
+    S : NDArray (n,) or iterable of NDArray
+        - States, or pieces of the trajectory in order
+    """
+    with TrajWriter(fname) as w:
+        for piece in ([S] if isinstance(S,np.ndarray) else S):
+            w.write(piece)
+
+def rle_chunks(start,state,tmax:int,chunk:int=2**24):
+    """Expands a run-length encoded trajectory piece by piece, see MM.rle_expand
+
+    Parameters
+    ----------
+    start : NDArray (k,) of int
+        - Time step at which each run starts
+    state : NDArray (k,) of int
+        - State of each run
+    tmax : int
+        - Last time step
+    chunk : int, optional
+        - No. of time steps per piece
+
+    Yields
+    ------
+    S : NDArray (chunk,) of int8
+        - State at each time step of the piece
+    """
+    start=np.asarray(start)
+    state=np.asarray(state,dtype=np.int8)
+    for a in range(0,tmax+1,chunk):
+        b=min(a+chunk,tmax+1)
+        # Runs overlapping [a,b), clipped to it
+        i=np.searchsorted(start,a,side='right')-1
+        j=np.searchsorted(start,b,side='left')
+        edges=np.clip(np.append(start[i:j],b),a,b)
+        yield np.repeat(state[i:j],np.diff(edges))
+
+class _Column:
+    # Lazily decoded column of a trajectory, sliced like an array
+    def __init__(self,traj,fn):
+        self.traj=traj
+        self.fn=fn
+
+    def __len__(self):
+        return len(self.traj)
+
+    def __getitem__(self,key):
+        return self.fn(self.traj,key)
+
+class Trajectory:
+    """Memory-mapped reader for bit-packed trajectory files
+
+    Only the bytes covering the requested steps are decoded, e.g.
+    traj.State[0:100], traj.G1[10**8:10**8+100]. Time, State, G1 (State%2)
+    and G2 (State//2) mirror the columns used in the analysis.
+
+    Parameters
+    ----------
+    fname : str
+        - Trajectory file written by TrajWriter or write_traj
+
+    Raises
+    ------
+    Not a trajectory file
+    """
+    def __init__(self,fname:str):
+        with open(fname,'rb') as f:
+            head=f.read(header)
+        if head[:len(magic)]!=magic:
+            raise Exception("Not a trajectory file")
+        self.n=int(np.frombuffer(head[len(magic):],dtype=np.uint64)[0])
+        self.data=np.memmap(fname,dtype=np.uint8,mode='r',offset=header,shape=(-(-self.n//4),)) if self.n else np.zeros(0,dtype=np.uint8)
+        self.State=_Column(self,Trajectory.__getitem__)
+        self.Time=_Column(self,Trajectory._time)
+        self.G1=_Column(self,lambda t,key: t[key]%2)
+        self.G2=_Column(self,lambda t,key: t[key]//2)
+
+    def __len__(self):
+        return self.n
+
+    def _time(self,key):
+        # Time steps of a slice or index array, built without the whole time axis
+        if isinstance(key,slice):
+            return np.arange(*key.indices(self.n))
+        idx=np.asarray(key,dtype=np.int64)
+        if np.any((idx<-self.n)|(idx>=self.n)):
+            raise IndexError("Time step out of range")
+        return np.where(idx<0,idx+self.n,idx)
+
+    def __getitem__(self,key):
+        if isinstance(key,slice):
+            r=range(*key.indices(self.n))
+            if len(r)==0:
+                return np.zeros(0,dtype=np.int8)
+            # Decode only the bytes spanning the slice
+            lo,hi=min(r[0],r[-1]),max(r[0],r[-1])
+            S=unpack(self.data[lo//4:hi//4+1])
+            return S[np.arange(r.start,r.stop,r.step)-lo//4*4]
+        # Same range check as Time, the last byte holds padding past n
+        idx=self._time(key)
+        return ((self.data[idx//4]>>(2*(idx%4)).astype(np.uint8))&3).astype(np.int8)
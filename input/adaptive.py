@@ -0,0 +1,15 @@
+import pandas as pd
+from adaptive import adaptive_sample
+
+## Input Parameters
+n0=2000 # No. of parameter sets in the initial uniform batch
+rounds=8 # No. of refinement rounds
+seed=2022 # Seed for a reproducible run
+parms=('loguni','uni')
+for parm in parms:
+    fname=parm+'-adaptive.csv' # Filename to save as
+
+    fname='../raw_output/'+fname
+    y,c=adaptive_sample(n0,parm,rounds,rng=seed) # Samples concentrated on category boundaries
+    df=pd.DataFrame(y,columns=['p','q','r','s','l','p00','p01','p10','p11']) # Convert to dataframe
+    df.to_csv(fname,index=False)
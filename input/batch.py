@@ -0,0 +1,19 @@
+import sys
+import time
+from arme import sweep_jobs, run_jobs
+
+## Input Parameters
+workers=int(sys.argv[1]) if len(sys.argv)>1 else None # No. of worker processes, all cores by default
+nP=100 # No. of parameter sets per axis for the sweeps
+nR=100000 # No. of parameter sets for the random sweeps
+chunk=10000 # No. of parameter sets solved per task
+seed=2022 # Root seed of the random sweeps
+ext='.npy' # Output format of the random sweeps
+out='../raw_output'
+
+# Single parameter and pairwise sweeps, then the random sweeps, all on one pool
+jobs=sweep_jobs('1d',nP,chunk,'.csv',out)+sweep_jobs('2d',nP,chunk,'.csv',out)+sweep_jobs('random',nR,chunk,ext,out,seed=seed)
+
+t=time.time()
+run_jobs(jobs,workers)
+print('%d sweeps in %.2f s'%(len(jobs),time.time()-t))